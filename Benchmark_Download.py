@@ -0,0 +1,129 @@
+"""
+Download throughput benchmark against the local mock EDGAR server.
+
+Starts Mock_EDGAR_Server with the requested fault profile, points EDGAR_Pac at it, then
+  times
+    1.  master-index download (download_masterindex, cache bypassed),
+    2.  the concurrent engine used by download_forms (EDGAR_Downloader), and
+    3.  optionally the serial General_Utilities.download_to_file path for comparison,
+  reporting filings/sec, bytes/sec, retries (by server status) and latency percentiles.
+
+Example:
+    python Benchmark_Download.py --filings 500 --latency 0.05 --p-throttle 0.02 --workers 8 --serial
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+import EDGAR_Downloader
+import EDGAR_Pac
+import EDGAR_Telemetry
+import General_Utilities
+from Mock_EDGAR_Server import MockConfig, MockEDGARServer
+
+
+def timed(download, latencies):
+    # Wrap a download(url, fname, ...) callable so each call's wall time is appended to latencies
+    def run(*args, **kwargs):
+        start = time.monotonic()
+        result = download(*args, **kwargs)
+        latencies.append(time.monotonic() - start)
+        return result
+    return run
+
+
+def report(label, n_jobs, n_failed, elapsed, out_dir, latencies, server_before, server_after):
+    n_bytes = sum(os.path.getsize(os.path.join(out_dir, f)) for f in os.listdir(out_dir))
+    by_status = dict(server_after['by_status'])
+    for status, count in server_before['by_status'].items():
+        by_status[status] = by_status.get(status, 0) - count
+    n_requests = server_after['requests'] - server_before['requests']
+    lat = np.array(latencies) if latencies else np.zeros(1)
+    print('\n{0}'.format(label))
+    print('  filings:      {0:,} ok | {1:,} failed | {2:.2f} seconds'.format(n_jobs - n_failed, n_failed, elapsed))
+    print('  throughput:   {0:,.1f} filings/sec | {1:,.0f} KB/sec written'.format(
+        (n_jobs - n_failed) / elapsed, n_bytes / 1024 / elapsed))
+    print('  requests:     {0:,} | retries = {1:,} | by status = {2}'.format(
+        n_requests, n_requests - n_jobs, {k: v for k, v in by_status.items() if v}))
+    print('  latency/job:  p50 = {0:.3f}s | p95 = {1:.3f}s | p99 = {2:.3f}s | max = {3:.3f}s'.format(
+        *np.percentile(lat, [50, 95, 99]), lat.max()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the EDGAR download path against a local mock server.')
+    parser.add_argument('--filings', type=int, default=200, help='number of filings to download')
+    parser.add_argument('--filing-size', type=int, default=200_000, help='approximate bytes per filing')
+    parser.add_argument('--workers', type=int, default=EDGAR_Downloader.PARM_N_WORKERS)
+    parser.add_argument('--max-rate', type=float, default=EDGAR_Downloader.PARM_MAX_RATE,
+                        help='engine requests/sec (SEC limit is 10)')
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--jitter', type=float, default=0.05)
+    parser.add_argument('--p-throttle', type=float, default=0.0, help='probability of 429')
+    parser.add_argument('--p-unavailable', type=float, default=0.0, help='probability of 503')
+    parser.add_argument('--retry-after', type=float, default=1.0)
+    parser.add_argument('--p-drop', type=float, default=0.0, help='probability of a dropped connection')
+    parser.add_argument('--bandwidth', type=float, default=0.0, help='bytes/sec per connection (0 = unlimited)')
+    parser.add_argument('--telemetry', default=None, help='also write engine telemetry JSON lines here')
+    parser.add_argument('--serial', action='store_true', help='also time the serial download_to_file path')
+    args = parser.parse_args()
+
+    config = MockConfig(latency=args.latency, jitter=args.jitter, p_throttle=args.p_throttle,
+                        p_unavailable=args.p_unavailable, retry_after=args.retry_after, p_drop=args.p_drop,
+                        bandwidth=args.bandwidth, filings_per_quarter=max(args.filings, 1000),
+                        filing_size=args.filing_size)
+    server = MockEDGARServer(config).start()
+    EDGAR_Pac.PARM_ROOT_PATH = server.base_url + 'Archives/edgar/full-index/'
+    prefix = server.base_url + 'Archives/'
+    work_dir = tempfile.mkdtemp(prefix='edgar_bench_')
+    print('Mock EDGAR server: {0} | work dir: {1}'.format(server.base_url, work_dir))
+
+    try:
+        # 1.  Master index
+        start = time.time()
+        masterindex = EDGAR_Pac.load_masterindex(2024, 1, cache_dir=None)
+        print('\nmaster index:  {0:,} rows | {1:.3f} seconds'.format(len(masterindex), time.time() - start))
+        items = list(masterindex)[:args.filings]
+
+        # 2.  Concurrent engine
+        out_dir = os.path.join(work_dir, 'engine')
+        os.makedirs(out_dir)
+        jobs = [(prefix + item.path, os.path.join(out_dir, item.path.replace('/', '_'))) for item in items]
+        telemetry = EDGAR_Telemetry.Telemetry(args.telemetry)
+        engine = EDGAR_Downloader.DownloadEngine(n_workers=args.workers, max_rate=args.max_rate,
+                                                 telemetry=telemetry)
+        latencies = []
+        engine.download_one = timed(engine.download_one, latencies)
+        before = server.stats()
+        start = time.time()
+        n_failed = len(engine.download(jobs))
+        report('engine ({0} workers, {1} req/s)'.format(args.workers, args.max_rate), len(jobs), n_failed,
+               time.time() - start, out_dir, latencies, before, server.stats())
+        print('  telemetry:    ' + EDGAR_Telemetry.format_summary(telemetry.summary('engine')))
+        telemetry.close()
+
+        # 3.  Serial baseline
+        if args.serial:
+            out_dir = os.path.join(work_dir, 'serial')
+            os.makedirs(out_dir)
+            jobs = [(prefix + item.path, os.path.join(out_dir, item.path.replace('/', '_'))) for item in items]
+            latencies = []
+            download_to_file = timed(General_Utilities.download_to_file, latencies)
+            before = server.stats()
+            start = time.time()
+            for _url, _fname in jobs:
+                download_to_file(_url, _fname)
+            n_failed = sum(1 for _url, _fname in jobs if not os.path.exists(_fname))
+            report('serial download_to_file', len(jobs), n_failed, time.time() - start, out_dir, latencies,
+                   before, server.stats())
+    finally:
+        server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Shared reader/writer for the downloaded filing corpus.
+
+Filings may be stored plain (*.txt) or compressed (*.txt.gz, or *.txt.zst when the
+  optional `zstandard` package is installed).  Every parser opens filings through
+  this module, so compression is transparent:  decompression happens in whichever
+  process reads the file, and filing_basename() strips the compression suffix so
+  output file names are identical to those of an uncompressed corpus.
+Wherever a path is accepted, a Corpus_Pack.PackedFiling reference works as well.
+"""
+
+import glob
+import gzip
+import io
+
+# Compression suffix -> name used by PARM_COMPRESS / compress=
+COMPRESSIONS = {'.gz': 'gzip', '.zst': 'zstd'}
+SUFFIXES = {name: suffix for suffix, name in COMPRESSIONS.items()}
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+CHUNK_SIZE = 1 << 22  # Characters read at a time by iter_chunks()
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd-compressed filings need the 'zstandard' package (pip install zstandard)")
+    return zstandard
+
+
+def compression_of(path):
+    # 'gzip', 'zstd' or None, from the file name
+    for suffix, name in COMPRESSIONS.items():
+        if path.endswith(suffix):
+            return name
+    return None
+
+
+def compressed_name(path, compress):
+    # File name a filing is stored under for a given compression (None = plain)
+    return path + SUFFIXES[compress] if compress else path
+
+
+def filing_basename(path):
+    # Base file name with any compression suffix removed
+    if not isinstance(path, str):  # Corpus_Pack.PackedFiling
+        path = path.name
+    name = path.replace('\\', '/').split('/')[-1]
+    compress = compression_of(name)
+    return name[:-len(SUFFIXES[compress])] if compress else name
+
+
+def open_binary(path, mode='rb'):
+    # Binary file object for a filing, decompressing/compressing by suffix
+    if not isinstance(path, str):  # Corpus_Pack.PackedFiling
+        return path.open_binary()
+    compress = compression_of(path)
+    if 'w' in mode:
+        return compressing_writer(open(path, mode), compress)
+    if compress == 'gzip':
+        return gzip.open(path, mode)
+    if compress == 'zstd':
+        return _zstandard().ZstdDecompressor().stream_reader(open(path, mode), closefd=True)
+    return open(path, mode)
+
+
+def compressing_writer(raw, compress):
+    # Wrap a binary file object so writes are compressed; closing the wrapper closes raw
+    if compress == 'gzip':
+        writer = gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=GZIP_LEVEL)
+        writer.myfileobj = raw  # GzipFile closes myfileobj on close()
+        return writer
+    if compress == 'zstd':
+        return _zstandard().ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw, closefd=True)
+    return raw
+
+
+def open_filing(path):
+    # Text-mode handle; same decoding as the parsers have always used
+    return io.TextIOWrapper(open_binary(path, 'rb'), encoding='utf-8', errors='ignore')
+
+
+def read_filing(path):
+    with open_filing(path) as f:
+        return f.read()
+
+
+def iter_chunks(path, chunk_size=CHUNK_SIZE):
+    # Text of a filing in pieces of about chunk_size characters (None = one piece), decoded as
+    #   read_filing() does.  Every piece but the last ends just after a newline or space, so no
+    #   word, number or 'May' straddles two pieces and per-piece counts add up to whole-file
+    #   counts.  Memory is O(chunk_size + longest stretch without a newline or space).
+    with open_filing(path) as f:
+        if chunk_size is None:
+            yield f.read()
+            return
+        carry = ''
+        while True:
+            block = f.read(chunk_size)
+            if not block:
+                break
+            buf = carry + block
+            cut = max(buf.rfind('\n'), buf.rfind(' ')) + 1
+            if cut:
+                yield buf[:cut]
+            carry = buf[cut:]
+        if carry:
+            yield carry
+
+
+def open_filing_write(path):
+    # Text-mode writer; compresses according to the suffix of path
+    return io.TextIOWrapper(open_binary(path, 'wb'), encoding='utf-8')
+
+
+def filing_glob(pattern, recursive=True):
+    # glob() that also matches compressed copies of *.txt files
+    files = glob.glob(pattern, recursive=recursive)
+    if pattern.endswith('.txt'):
+        for suffix in COMPRESSIONS:
+            files.extend(glob.glob(pattern + suffix, recursive=recursive))
+    return files
@@ -0,0 +1,185 @@
+"""
+Sharded pack-file format for the filing corpus.
+
+Walking data/<year>/QTR<n>/ and opening hundreds of thousands of small files dominates
+  parse time on network storage.  pack_tree() concatenates the stored bytes of every
+  filing (plain or compressed, see Corpus_IO) into large shard files:
+
+    <pack_dir>/shard_00000.pack, shard_00001.pack, ...
+    <pack_dir>/index.npy     structured array, one row per filing:
+                             name (path relative to the data root, without compression
+                             suffix), shard, offset, length, compression, cik, filingdate
+    <pack_dir>/pack.json     format version and shard count
+
+The index is memory-mapped, so enumerating the corpus is near-instant.  list_filings()
+  returns PackedFiling references that the parsers pass to Corpus_IO.read_filing() and
+  Corpus_IO.filing_basename() exactly as they would a path; shards are memory-mapped
+  once per process and filings are streamed out of them without copying a whole filing.
+"""
+
+import io
+import json
+import os
+import re
+import time
+from collections import namedtuple
+from fnmatch import fnmatchcase
+
+import numpy as np
+
+import Corpus_IO
+
+# === CONFIGURATION ===
+DATA_ROOT = os.path.expanduser('~/Desktop/asg1/data/')
+PACK_DIR = os.path.expanduser('~/Desktop/asg1/data_pack/')
+SHARD_SIZE = 1 << 30       # Start a new shard once the current one passes 1 GB
+
+PACK_VERSION = 1
+INDEX_NAME = 'index.npy'
+META_NAME = 'pack.json'
+COMPRESSION_CODES = {None: 0, 'gzip': 1, 'zstd': 2}
+_CODE_COMPRESSION = {code: name for name, code in COMPRESSION_CODES.items()}
+# download_forms names files <filingdate>_<form>_edgar_data_<cik>_<accession>_<n>.txt
+_NAME_META = re.compile(r'(\d{8})_.*?edgar_data_(\d+)_')
+
+
+def shard_name(shard):
+    return 'shard_{0:05d}.pack'.format(shard)
+
+
+# === Packer ===
+def pack_tree(data_root=DATA_ROOT, pack_dir=PACK_DIR, shard_size=SHARD_SIZE, flag=True):
+    # Pack every filing under data_root into shards in pack_dir; returns the number packed
+    start = time.time()
+    files = sorted(Corpus_IO.filing_glob(os.path.join(data_root, '**/*.txt')))
+    os.makedirs(pack_dir, exist_ok=True)
+
+    rows = []
+    shard, offset = 0, 0
+    f_shard = open(os.path.join(pack_dir, shard_name(shard)), 'wb')
+    for filepath in files:
+        with open(filepath, 'rb') as f_in:
+            data = f_in.read()
+        if offset and offset + len(data) > shard_size:
+            f_shard.close()
+            shard, offset = shard + 1, 0
+            f_shard = open(os.path.join(pack_dir, shard_name(shard)), 'wb')
+        f_shard.write(data)
+
+        relpath = os.path.relpath(filepath, data_root).replace(os.sep, '/')
+        compress = Corpus_IO.compression_of(relpath)
+        name = relpath[:-len(Corpus_IO.SUFFIXES[compress])] if compress else relpath
+        match = _NAME_META.search(os.path.basename(name))
+        cik, filingdate = (int(match.group(2)), int(match.group(1))) if match else (0, 0)
+        rows.append((name.encode('utf-8'), shard, offset, len(data), COMPRESSION_CODES[compress], cik, filingdate))
+        offset += len(data)
+    f_shard.close()
+
+    width = max([len(row[0]) for row in rows] + [1])
+    index = np.array(rows, dtype=[('name', 'S{0}'.format(width)), ('shard', '<u4'), ('offset', '<u8'),
+                                  ('length', '<u8'), ('compression', 'u1'), ('cik', '<u8'),
+                                  ('filingdate', '<u4')])
+    np.save(os.path.join(pack_dir, INDEX_NAME), index)
+    with open(os.path.join(pack_dir, META_NAME), 'w') as f:
+        json.dump({'version': PACK_VERSION, 'shards': shard + 1, 'filings': len(rows),
+                   'created': time.strftime('%Y-%m-%d %H:%M:%S')}, f)
+
+    if flag:
+        print('pack_tree:  {0:,} filings -> {1} shard(s) | Time = {2:.2f} seconds'.
+              format(len(rows), shard + 1, time.time() - start))
+    return len(rows)
+
+
+# === Reader ===
+def load_index(pack_dir=PACK_DIR):
+    # Memory-mapped index array
+    with open(os.path.join(pack_dir, META_NAME), 'r') as f:
+        meta = json.load(f)
+    if meta.get('version') != PACK_VERSION:
+        raise ValueError('Unsupported pack version {0} in {1}'.format(meta.get('version'), pack_dir))
+    return np.load(os.path.join(pack_dir, INDEX_NAME), mmap_mode='r')
+
+
+_shards = {}  # (pack_dir, shard) -> np.memmap, opened once per process
+
+
+def _shard_view(pack_dir, shard):
+    key = (pack_dir, shard)
+    if key not in _shards:
+        _shards[key] = np.memmap(os.path.join(pack_dir, shard_name(shard)), dtype=np.uint8, mode='r')
+    return _shards[key]
+
+
+class _SliceReader(io.RawIOBase):
+    # Raw stream over a memoryview; each read copies only the bytes asked for
+
+    def __init__(self, view):
+        self._view = view
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        n = min(len(b), len(self._view) - self._pos)
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+
+class PackedFiling(namedtuple('PackedFiling', 'pack_dir shard offset length compression name')):
+    # Picklable reference to one filing inside a pack; accepted by Corpus_IO in place of a path
+    __slots__ = ()
+
+    def view(self):
+        # Stored (possibly compressed) bytes as a memoryview of the memory-mapped shard
+        return memoryview(_shard_view(self.pack_dir, self.shard)[self.offset:self.offset + self.length])
+
+    def read_bytes(self):
+        # Stored (possibly compressed) bytes, copied
+        return self.view().tobytes()
+
+    def open_binary(self):
+        # Decompressed binary stream, read from the memory-mapped shard in buffer-sized pieces
+        raw = io.BufferedReader(_SliceReader(self.view()))
+        compress = _CODE_COMPRESSION[self.compression]
+        if compress == 'gzip':
+            import gzip
+            return gzip.GzipFile(fileobj=raw, mode='rb')
+        if compress == 'zstd':
+            return Corpus_IO._zstandard().ZstdDecompressor().stream_reader(raw)
+        return raw
+
+
+def list_filings(pack_dir=PACK_DIR, pattern='**/*.txt', ciks=None, bgn_date=None, end_date=None):
+    # PackedFiling references for filings whose relative name matches pattern (fnmatch),
+    #   optionally filtered on the cik/filingdate columns; ordered by shard and offset
+    index = load_index(pack_dir)
+    keep = np.ones(len(index), dtype=bool)
+    if ciks is not None:
+        keep &= np.isin(index['cik'], np.fromiter((int(c) for c in ciks), dtype=np.uint64))
+    if bgn_date is not None:
+        keep &= index['filingdate'] >= int(bgn_date)
+    if end_date is not None:
+        keep &= index['filingdate'] <= int(end_date)
+    refs = []
+    for row in index[keep]:
+        name = row['name'].decode('utf-8')
+        if pattern is None or fnmatchcase(name, pattern):
+            refs.append(PackedFiling(pack_dir, int(row['shard']), int(row['offset']), int(row['length']),
+                                     int(row['compression']), name))
+    return refs
+
+
+def iter_filings(pack_dir=PACK_DIR, pattern='**/*.txt'):
+    # Sequentially yield (PackedFiling, text) for every matching filing
+    for ref in list_filings(pack_dir, pattern):
+        yield ref, Corpus_IO.read_filing(ref)
+
+
+if __name__ == '__main__':
+    print('\n' + time.strftime('%c') + '\nCorpus_Pack.py\n')
+    pack_tree()
+    start = time.time()
+    print('{0:,} filings enumerated in {1:.4f} seconds.'.format(len(list_filings()), time.time() - start))
+    print('\n' + time.strftime('%c') + '\nNormal termination.')
@@ -4,9 +4,17 @@
     ND-SRAF / McDonald : 201606
     https://sraf.nd.edu
     Dependencies (i.e., modules you must already have downloaded)
+      Corpus_IO.py
       EDGAR_Forms.py
+      EDGAR_Downloader.py
+      EDGAR_FilingIndex.py
+      EDGAR_Manifest.py
       EDGAR_Pac.py
+      EDGAR_Scheduler.py
+      EDGAR_Scrubber.py
+      EDGAR_Telemetry.py
       General_Utilities.py
+      SP500_Membership.py
 """
 
 import os
@@ -15,9 +23,16 @@ import sys
 # Modify the following statement to identify the path for local modules
 #sys.path.append('D:\GD\Python\TextualAnalysis\Modules')
 # Since these imports are dynamically mapped your IDE might flag an error...it's OK
+import Corpus_IO
 import EDGAR_Forms  # This module contains some predefined form groups
+import EDGAR_Downloader
+import EDGAR_IndexStore
+import EDGAR_Manifest
 import EDGAR_Pac
-import General_Utilities
+import EDGAR_Scheduler
+import EDGAR_Scrubber
+import EDGAR_Telemetry
+import SP500_Membership
 
 
 # * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * +
@@ -31,8 +46,9 @@ import General_Utilities
 #             transfer requests be performed between 9 PM and 6 AM Eastern 
 #             time. Please use efficient scripting, downloading only what you
 #             need and space out requests to minimize server load."
-#        Note that the program will check the clock every 10 minutes and only
-#            download files during the appropriate time.
+#        With PARM_TIME_WINDOW = True the program queues each quarter's requests
+#            and issues them only during that window (see EDGAR_Scheduler.py),
+#            scrubbing already-downloaded quarters while it waits.
 #        Be a good citizen...keep your requests targeted.
 #
 #        For large downloads you will sometimes get a hiccup in the server
@@ -65,19 +81,59 @@ PARM_PATH = os.path.expanduser('~/Desktop/asg1/data10K/')
 PARM_LOGFILE = os.path.expanduser('~/Desktop/asg1/results/EDGAR_Download_10Q_Log.txt')
 # EDGAR parameter
 PARM_EDGARPREFIX = 'https://www.sec.gov/Archives/'
+# Concurrent downloads share one rate limit (SEC allows at most 10 requests/second)
+PARM_WORKERS = 8
+PARM_MAX_RATE = 10
+# Store filings compressed:  None, 'gzip' (.txt.gz) or 'zstd' (.txt.zst, needs the zstandard package)
+#   Parsers read either form transparently through Corpus_IO.
+PARM_COMPRESS = None
+# None downloads the full submission .txt.  A tuple downloads only the primary document plus
+#   these exhibit types (e.g. () for the 10-K text alone, ('EX-13',) to add the annual report),
+#   using each filing's -index.htm page.  Much smaller; see EDGAR_FilingIndex.py.
+PARM_EXHIBITS = None
+# Keep the SQLite store of all cached master indices (EDGAR_IndexStore) up to date as quarters are cached
+PARM_INDEX_STORE = True
+# Download manifest (SQLite) used to skip completed files and replay failures on reruns
+PARM_MANIFEST = EDGAR_Manifest.default_manifest_path(PARM_PATH)
+# Per-request telemetry (JSON lines, one summary line per quarter); None to disable
+PARM_TELEMETRY = os.path.expanduser('~/Desktop/asg1/results/EDGAR_Download_Telemetry.jsonl')
+# Only issue requests in SEC's 9 PM - 6 AM Eastern bulk window
+PARM_TIME_WINDOW = False
+# If set (and PARM_TIME_WINDOW), downloaded quarters are scrubbed into this path while the window is closed
+#   (scrubs still queued after the last quarter run before the program exits)
+PARM_SCRUB_PATH = None
 
-SP500_CIKS = set(open('sp500_2024ciks.txt', 'r').read().splitlines())
+# Point-in-time S&P 500 filter:  each quarter keeps filers that were constituents at any time
+#   during the quarter.  cik.py writes one sp500_ciks_<year>.csv snapshot per year-end.
+PARM_SP500_SNAPSHOTS = SP500_Membership.PARM_CIK_SNAPSHOTS
 #
 # * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * +
 
 
 def download_forms():
-    # Load S&P 500 CIKs
-    with open('sp500_2024ciks.txt', 'r') as f:
-        SP500_CIKS = set(line.strip() for line in f)
+    # Load S&P 500 membership history
+    membership = SP500_Membership.load_cik_snapshots(PARM_SP500_SNAPSHOTS)
 
     f_log = open(PARM_LOGFILE, 'a')
+    if not os.path.exists(PARM_PATH):
+        os.makedirs(PARM_PATH)
+    manifest = EDGAR_Manifest.DownloadManifest(PARM_MANIFEST)
+    telemetry = EDGAR_Telemetry.Telemetry(PARM_TELEMETRY) if PARM_TELEMETRY else None
+    engine = EDGAR_Downloader.DownloadEngine(n_workers=PARM_WORKERS, max_rate=PARM_MAX_RATE, f_log=f_log,
+                                             manifest=manifest, compress=PARM_COMPRESS,
+                                             exhibits=PARM_EXHIBITS, telemetry=telemetry)
+    downloader = EDGAR_Scheduler.WindowScheduler(engine) if PARM_TIME_WINDOW else engine
     f_log.write('BEGIN LOOPS:  {0}\n'.format(time.strftime('%c')))
+    # Quarters before the first snapshot use the earliest one; say which snapshot to generate
+    message = membership.missing_snapshot_message(*SP500_Membership.quarter_bounds(PARM_BGNYEAR, PARM_BGNQTR))
+    if message:
+        print('\nWarning:  ' + message)
+        f_log.write('WARNING:  {0}\n'.format(message))
+    # Fetch all missing master indices up front, in parallel; the loop below then reads the local cache
+    index_store = EDGAR_IndexStore.IndexStore() if PARM_INDEX_STORE else None
+    EDGAR_Pac.cache_masterindices(PARM_BGNYEAR, PARM_ENDYEAR, PARM_BGNQTR, PARM_ENDQTR, store=index_store)
+    if index_store:
+        index_store.close()
     n_tot = 0
     n_errs = 0
     for year in range(PARM_BGNYEAR, PARM_ENDYEAR + 1):
@@ -90,40 +146,64 @@ def download_forms():
             if not os.path.exists(path):
                 os.makedirs(path)
                 print('Path: {0} created'.format(path))
-            masterindex = EDGAR_Pac.download_masterindex(year, qtr, True)
+            # Form and S&P 500 CIK filters are applied inside the columnar index parser
+            sp500_ciks = membership.members(*SP500_Membership.quarter_bounds(year, qtr))
+            # cache_masterindices just revalidated the open quarter; read the cache as is
+            masterindex = EDGAR_Pac.load_masterindex(year, qtr, forms=PARM_FORMS, ciks=sp500_ciks,
+                                                     revalidate=False)
             if masterindex:
+                jobs = []
                 for item in masterindex:
-                    #while EDGAR_Pac.edgar_server_not_available(True):  # Comment out this line to disable time checks
-                        #pass
-                    # Check if form is 10-Q and CIK is in S&P 500 list
-                    if item.form in PARM_FORMS and str(item.cik).zfill(10) in SP500_CIKS:
-                        n_qtr += 1
-                        # Keep track of filings and identify duplicates
-                        fid = str(item.cik) + str(item.filingdate) + item.form
-                        if fid in file_count:
-                            file_count[fid] += 1
-                        else:
-                            file_count[fid] = 1
-                        # Setup EDGAR URL and output file name
-                        url = PARM_EDGARPREFIX + item.path
-                        fname = (path + str(item.filingdate) + '_' + item.form.replace('/', '-') + '_' +
-                                 item.path.replace('/', '_'))
-                        fname = fname.replace('.txt', '_' + str(file_count[fid]) + '.txt')
-                        return_url = General_Utilities.download_to_file(url, fname, f_log)
-                        if return_url:
-                            n_errs += 1
-                        n_tot += 1
-                        # time.sleep(1)  # Space out requests
+                    n_qtr += 1
+                    # Keep track of filings and identify duplicates
+                    fid = str(item.cik) + str(item.filingdate) + item.form
+                    if fid in file_count:
+                        file_count[fid] += 1
+                    else:
+                        file_count[fid] = 1
+                    # Setup EDGAR URL and output file name
+                    url = PARM_EDGARPREFIX + item.path
+                    fname = (path + str(item.filingdate) + '_' + item.form.replace('/', '-') + '_' +
+                             item.path.replace('/', '_'))
+                    fname = fname.replace('.txt', '_' + str(file_count[fid]) + '.txt')
+                    fname = Corpus_IO.compressed_name(fname, PARM_COMPRESS)
+                    # Manifest key: accession path + the same _N used in the file name
+                    jobs.append((url, fname, (item.path, file_count[fid])))
+                # Skip filings already completed on a previous run
+                jobs = manifest.pending(jobs)
+                # Requests are spaced out by the engine's shared rate limiter (and held for the
+                #   bulk window when PARM_TIME_WINDOW is set)
+                n_errs += len(downloader.download(jobs))
+                n_tot += len(jobs)
+                if PARM_TIME_WINDOW and PARM_SCRUB_PATH:
+                    downloader.add_offline(scrub_job, [fname for _url, fname, _key in jobs])
             print(str(year) + ':' + str(qtr) + ' -> {0:,}'.format(n_qtr) + ' downloads completed.  Time = ' +
                   time.strftime('%H:%M:%S', time.gmtime(time.time() - startloop))   +
                   ' | ' + time.strftime('%c'))
             f_log.write('{0} | {1} | n_qtr = {2:>8,} | n_tot = {3:>8,} | n_err = {4:>6,} | {5}\n'.
                         format(year, qtr, n_qtr, n_tot, n_errs, time.strftime('%c')))
+            if telemetry:
+                summary = EDGAR_Telemetry.format_summary(telemetry.summary('{0}:{1}'.format(year, qtr)))
+                print('  ' + summary)
+                f_log.write('  {0}\n'.format(summary))
 
             f_log.flush()
 
+    if PARM_TIME_WINDOW and PARM_SCRUB_PATH:
+        # Scrubs still queued (the last quarter's, or all of them if the window never closed)
+        n_scrubbed = downloader.run_offline(until_open=False)
+        print('{0:,} filing(s) scrubbed after the last quarter.'.format(n_scrubbed))
     print('{0:,} total forms downloaded.'.format(n_tot))
     f_log.write('\n{0:,} total forms downloaded.'.format(n_tot))
+    manifest.close()
+    if telemetry:
+        telemetry.close()
+
+
+def scrub_job(fname):
+    # Offline work for the scheduler:  scrub one downloaded filing into PARM_SCRUB_PATH
+    if os.path.exists(fname):
+        EDGAR_Scrubber.scrub_file(fname, os.path.join(PARM_SCRUB_PATH, os.path.relpath(fname, PARM_PATH)))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,333 @@
+#!/usr/bin/python3
+"""
+    Concurrent, rate-limited download engine for EDGAR filings
+    A pool of worker threads shares one token bucket, so the aggregate request
+      rate stays under the SEC limit no matter how many workers are running.
+    Each worker keeps its own keep-alive connection per host.
+    On 429/503 the shared rate is halved (once per Retry-After window, however
+      many workers see the throttle) and all workers pause for the server's
+      Retry-After; each success then closes a fixed fraction of the gap to the
+      maximum rate.
+      A throttled request is retried without using up one of number_of_tries.
+    With a Telemetry attached, every request and retry is recorded
+      (see EDGAR_Telemetry).
+    With exhibits set, each filing's -index.htm is read first and only the
+      primary document (plus the listed exhibit types) is downloaded
+      (see EDGAR_FilingIndex).
+    See:  https://www.sec.gov/os/accessing-edgar-data
+"""
+
+import http.client
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import EDGAR_FilingIndex
+import General_Utilities
+
+
+# -----------------------
+# Engine parameters
+# -----------------------
+
+PARM_MAX_RATE = 10     # SEC fair-access limit: requests per second, all workers combined
+PARM_MIN_RATE = 0.5    # Floor for adaptive backoff
+PARM_RECOVERY = 0.1    # Fraction of the gap to the maximum rate recovered per successful download
+PARM_MAX_THROTTLES = 50  # 429/503 responses tolerated per file before it counts as failed
+PARM_N_WORKERS = 8     # Concurrent connections
+PARM_TIMEOUT = 60      # Socket timeout in seconds
+PARM_MAX_REDIRECTS = 3
+THROTTLE_CODES = (429, 503)
+
+
+class TokenBucket:
+    # Shared request-rate limiter with adaptive backoff:
+    #   throttle() halves the rate and blocks every caller until a deadline; further
+    #     throttles before that deadline belong to the same burst and are ignored,
+    #   reward() closes the fraction recovery of the gap to the maximum rate per success.
+
+    def __init__(self, rate=PARM_MAX_RATE, min_rate=PARM_MIN_RATE, capacity=None, recovery=PARM_RECOVERY):
+        self.max_rate = rate
+        self.min_rate = min_rate
+        self.recovery = recovery
+        self.rate = rate
+        self.capacity = capacity if capacity else rate
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+                    self.stamp = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def throttle(self, delay):
+        with self.lock:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                return  # already backing off for this burst
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0
+            self.stamp = now
+            self.blocked_until = now + delay
+
+    def reward(self):
+        with self.lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + (self.max_rate - self.rate) * self.recovery)
+
+
+class ConnectionPool:
+    # One persistent HTTP(S) connection per (thread, scheme, host)
+
+    def __init__(self, timeout=PARM_TIMEOUT):
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def get(self, scheme, netloc):
+        conns = self.local.__dict__.setdefault('conns', {})
+        key = (scheme, netloc)
+        if key not in conns:
+            if scheme == 'https':
+                conns[key] = http.client.HTTPSConnection(netloc, timeout=self.timeout)
+            else:
+                conns[key] = http.client.HTTPConnection(netloc, timeout=self.timeout)
+        return conns[key]
+
+    def discard(self, scheme, netloc):
+        conns = self.local.__dict__.get('conns', {})
+        conn = conns.pop((scheme, netloc), None)
+        if conn:
+            conn.close()
+
+
+class HTTPStatusError(Exception):
+    def __init__(self, status, reason, retry_after=None):
+        super().__init__('HTTP Error {0}: {1}'.format(status, reason))
+        self.status = status
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value, default):
+    # Retry-After is either delta-seconds or an HTTP-date
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+class DownloadEngine:
+
+    def __init__(self, n_workers=PARM_N_WORKERS, max_rate=PARM_MAX_RATE, number_of_tries=3,
+                 headers=None, f_log=None, manifest=None, compress=None, exhibits=None, telemetry=None):
+        self.n_workers = n_workers
+        self.number_of_tries = number_of_tries
+        self.headers = dict(headers if headers else General_Utilities.HTTP_HEADERS)
+        self.bucket = TokenBucket(max_rate)
+        self.pool = ConnectionPool()
+        self.f_log = f_log
+        self.manifest = manifest  # optional EDGAR_Manifest.DownloadManifest
+        self.compress = compress  # None, 'gzip' or 'zstd'; fnames should carry the matching suffix
+        self.exhibits = exhibits  # None = full submission .txt; else primary document + these exhibit types
+        self.telemetry = telemetry  # optional EDGAR_Telemetry.Telemetry
+        self.queued = 0  # jobs handed to download() and not yet started (queue depth)
+        self.log_lock = threading.Lock()
+
+    def fetch(self, _url, _fname=None, attempt=1):
+        # Single GET over the calling thread's keep-alive connection, streamed to _fname
+        # Returns (bytes written, sha256), or the body itself when _fname is None;
+        #   raises HTTPStatusError on non-2xx
+        for _ in range(PARM_MAX_REDIRECTS + 1):
+            parts = urlsplit(_url)
+            target = parts.path + ('?' + parts.query if parts.query else '')
+            self.bucket.acquire()
+            conn = self.pool.get(parts.scheme, parts.netloc)
+            start = time.monotonic()
+            try:
+                conn.request('GET', target, headers=self.headers)
+                response = conn.getresponse()
+                if 200 <= response.status < 300 and _fname is None:
+                    result = b''.join(General_Utilities.iter_body(response))
+                elif 200 <= response.status < 300:
+                    result = General_Utilities.stream_to_file(response, _fname, compress=self.compress)
+                else:
+                    result = response.read()  # always drain so the connection can be reused
+            except Exception as exc:
+                self.pool.discard(parts.scheme, parts.netloc)
+                if self.telemetry:
+                    self.telemetry.request(_url, type(exc).__name__, time.monotonic() - start, 0, attempt,
+                                           self.queued, self.bucket.rate)
+                raise
+            if self.telemetry:
+                # Wire bytes when the server reports them, else what was received:  the body
+                #   (bytes, also a drained error body) or stream_to_file's (bytes written, sha256)
+                n_bytes = response.getheader('Content-Length')
+                n_bytes = int(n_bytes) if n_bytes else len(result) if isinstance(result, bytes) else result[0]
+                self.telemetry.request(_url, response.status, time.monotonic() - start, n_bytes, attempt,
+                                       self.queued, self.bucket.rate)
+            if response.will_close:
+                self.pool.discard(parts.scheme, parts.netloc)
+            if response.status in (301, 302, 303, 307, 308) and response.getheader('Location'):
+                _url = response.getheader('Location')
+                if _url.startswith('/'):
+                    _url = '{0}://{1}{2}'.format(parts.scheme, parts.netloc, _url)
+                continue
+            if response.status >= 300:
+                raise HTTPStatusError(response.status, response.reason,
+                                      response.getheader('Retry-After'))
+            return result
+        raise HTTPStatusError(310, 'Too many redirects')
+
+    def fetch_documents(self, _url, _fname=None, attempt=1):
+        # Primary document (plus self.exhibits) of the filing at _url, via its -index.htm,
+        #   reassembled in full-submission layout; same return as fetch()
+        index_url = EDGAR_FilingIndex.filing_index_url(_url)
+        page = self.fetch(index_url, attempt=attempt).decode('utf-8', errors='ignore')
+        documents = EDGAR_FilingIndex.select_documents(EDGAR_FilingIndex.parse_filing_index(page, index_url),
+                                                       self.exhibits)
+        if not documents:
+            raise IOError('No documents listed in {0}'.format(index_url))
+        parts = [(doc, self.fetch(doc.url, attempt=attempt)) for doc in documents]
+        if _fname is None:
+            return b''.join(EDGAR_FilingIndex.document_blocks(parts))
+        return General_Utilities.write_blocks(EDGAR_FilingIndex.document_blocks(parts), _fname, self.compress)
+
+    def download_one(self, _url, _fname, key=None):
+        # Mirrors General_Utilities.download_to_file: returns None on success, _url on failure
+        # key:  manifest key (accession path, duplicate number), if a manifest is attached
+        with self.log_lock:
+            self.queued = max(0, self.queued - 1)
+        return None if self.retrieve(_url, _fname, key) is not None else _url
+
+    def retrieve(self, _url, _fname=None, key=None):
+        # fetch() with retries and backoff; returns its result, or None once all tries fail
+        #   (_fname=None returns the body in memory; see fetch)
+        # 429/503 is back-pressure rather than a failure of the file:  it pauses the bucket and
+        #   retries without counting against number_of_tries (up to PARM_MAX_THROTTLES times)
+        if self.manifest and key:
+            self.manifest.start(key, _url, _fname)
+        sleep_time = 0.01  # Note sleep time accumulates according to err
+        error = ''
+        i = 1
+        n_throttled = 0
+        while i <= self.number_of_tries:
+            try:
+                if self.exhibits is None:
+                    result = self.fetch(_url, _fname, i)
+                else:
+                    result = self.fetch_documents(_url, _fname, i)
+                self.bucket.reward()
+                if self.manifest and key:
+                    self.manifest.finish(key, *result)
+                return result
+            except Exception as exc:
+                error = str(exc)
+                print('  {0}. _url:  {1}  Warning: {2}  [{3}]'.format(i, _url, str(exc), time.strftime('%c')))
+                status = getattr(exc, 'status', None)
+                if status == 404:
+                    break
+                throttled = status in THROTTLE_CODES and n_throttled < PARM_MAX_THROTTLES
+                if self.telemetry and (throttled or i < self.number_of_tries):
+                    self.telemetry.retry(_url, status if status else type(exc).__name__, i)
+                if throttled:
+                    n_throttled += 1
+                    self.bucket.throttle(parse_retry_after(exc.retry_after, sleep_time * 100))
+                    continue
+                time.sleep(sleep_time)
+                sleep_time += sleep_time
+                i += 1
+
+        if self.manifest and key:
+            self.manifest.fail(key, error)
+        with self.log_lock:
+            General_Utilities.log_download_error(_url, _fname, self.f_log)
+        return None
+
+    def download(self, jobs):
+        # jobs:  iterable of (url, fname) or (url, fname, manifest key)
+        # Returns the list of urls that failed
+        jobs = list(jobs)
+        self.queued = len(jobs)
+        with ThreadPoolExecutor(max_workers=self.n_workers) as executor:
+            results = executor.map(lambda job: self.download_one(*job), jobs)
+            return [_url for _url in results if _url]
+
+
+def check_throttle_path():
+    # Self-check against a local server:  a 429 with an empty body and no Content-Length, while
+    #   telemetry is attached, must go through the throttle path (rate halved, no try used up)
+    #   and the retried download must succeed.  Returns the number of failures.
+    import os
+    import tempfile
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    import EDGAR_Telemetry
+
+    class Handler(BaseHTTPRequestHandler):
+        n_requests = 0
+
+        def do_GET(self):
+            Handler.n_requests += 1
+            self.close_connection = True
+            if Handler.n_requests == 1:
+                self.send_response(429)
+                self.send_header('Retry-After', '0.1')
+                self.end_headers()  # empty body, no Content-Length
+            else:
+                self.send_response(200)
+                self.send_header('Content-Length', '5')
+                self.end_headers()
+                self.wfile.write(b'filed')
+
+        def log_message(self, format, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    telemetry = EDGAR_Telemetry.Telemetry()
+    engine = DownloadEngine(n_workers=1, max_rate=PARM_MAX_RATE, number_of_tries=1, telemetry=telemetry)
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        fname = os.path.join(tmp, 'filing.txt')
+        if engine.download([('http://127.0.0.1:{0}/filing.txt'.format(server.server_address[1]), fname)]):
+            failures.append('download failed after a 429 with an empty body')
+        elif open(fname, 'rb').read() != b'filed':
+            failures.append('wrong file content')
+    server.shutdown()
+    server.server_close()
+    if engine.bucket.rate >= PARM_MAX_RATE:
+        failures.append('429 did not throttle the bucket (rate {0})'.format(engine.bucket.rate))
+    if telemetry.statuses['429'] != 1 or telemetry.retries['429'] != 1:
+        failures.append('telemetry: {0} {1}'.format(dict(telemetry.statuses), dict(telemetry.retries)))
+    for failure in failures:
+        print('check_throttle_path failed:  ' + failure)
+    return len(failures)
+
+
+# Test routine
+if __name__ == '__main__':
+    print('\n' + time.strftime('%c') + '\nND_SRAF:  Program EDGAR_Downloader.py\n')
+    print('Throttle path self-check:  {0} failure(s).'.format(check_throttle_path()))
+    engine = DownloadEngine(n_workers=2, max_rate=2)
+    failed = engine.download([('https://www.sec.gov/Archives/edgar/data/1046568/0001193125-15-075170.zzz',
+                               '/tmp/DL_test.txt')])
+    print('\n{0} failed download(s).'.format(len(failed)))
+    print(time.strftime('%c'))
@@ -0,0 +1,90 @@
+#!/usr/bin/python3
+"""
+    Per-filing index pages on EDGAR
+    Every accession has a small index page listing its documents, e.g.
+      https://www.sec.gov/Archives/edgar/data/320193/000032019324000123/0000320193-24-000123-index.htm
+    whose "Document Format Files" table gives each document's sequence, type
+      (10-K, EX-21.1, GRAPHIC, ...), file name and size.
+    Fetching that page first and then only the primary document (plus selected
+      exhibits) avoids downloading the full submission .txt, which also carries
+      every exhibit, XBRL instance and uuencoded image.
+    The selected documents are reassembled in the full-submission layout
+      (<DOCUMENT><TYPE>..<TEXT>..</TEXT></DOCUMENT>), so EDGAR_Scrubber and the
+      parsers read them exactly as they read a full .txt.
+"""
+
+import html
+import re
+from collections import namedtuple
+from urllib.parse import urljoin
+
+
+FilingDocument = namedtuple('FilingDocument', 'seq description url type size')
+
+_ROW = re.compile(r'<tr[^>]*>(.*?)</tr>', re.S | re.I)
+_CELL = re.compile(r'<td[^>]*>(.*?)</td>', re.S | re.I)
+_HREF = re.compile(r'href="([^"]+)"', re.I)
+_TAG = re.compile(r'<[^>]+>')
+_TABLE = re.compile(r'<table[^>]*summary="Document Format Files"[^>]*>(.*?)</table>', re.S | re.I)
+
+
+def filing_index_url(_url):
+    # Full-submission url (.../edgar/data/<cik>/<accession>.txt) -> its -index.htm url
+    base, accession = _url.rsplit('/', 1)
+    accession = accession[:-len('.txt')] if accession.endswith('.txt') else accession
+    return '{0}/{1}/{2}-index.htm'.format(base, accession.replace('-', ''), accession)
+
+
+def parse_filing_index(page, index_url):
+    # FilingDocument for each row of the "Document Format Files" table, in sequence order
+    match = _TABLE.search(page)
+    documents = []
+    for row in _ROW.findall(match.group(1) if match else page):
+        cells = _CELL.findall(row)
+        if len(cells) < 5:
+            continue
+        text = [html.unescape(_TAG.sub('', cell)).strip() for cell in cells]
+        href = _HREF.search(cells[2])
+        if not text[0].isdigit() or not href:  # header row or the complete-submission row
+            continue
+        # Inline XBRL documents link through the viewer:  /ix?doc=/Archives/...
+        link = href.group(1).split('?doc=', 1)[-1]
+        size = int(text[4]) if text[4].isdigit() else 0
+        documents.append(FilingDocument(int(text[0]), text[1], urljoin(index_url, link), text[3].upper(), size))
+    return sorted(documents)
+
+
+def select_documents(documents, exhibit_types=()):
+    # The primary document (sequence 1) plus any document whose type is listed in exhibit_types;
+    #   'EX-21' also selects 'EX-21.1', etc.
+    exhibit_types = tuple(t.upper() for t in exhibit_types)
+    selected = []
+    for i, doc in enumerate(documents):
+        if i == 0 or any(doc.type == t or doc.type.startswith(t + '.') for t in exhibit_types):
+            selected.append(doc)
+    return selected
+
+
+def document_blocks(parts):
+    # parts:  [(FilingDocument, body bytes)] -> byte blocks in full-submission layout
+    for doc, body in parts:
+        yield ('<DOCUMENT>\n<TYPE>{0}\n<SEQUENCE>{1}\n<FILENAME>{2}\n<DESCRIPTION>{3}\n<TEXT>\n'.
+               format(doc.type, doc.seq, doc.url.rsplit('/', 1)[-1], doc.description).encode('utf-8'))
+        yield body
+        yield b'\n</TEXT>\n</DOCUMENT>\n'
+
+
+# Test routine
+if __name__ == '__main__':
+    import gzip
+    import time
+    from urllib.request import Request, urlopen
+    import General_Utilities
+    print('\n' + time.strftime('%c') + '\nND_SRAF:  Program EDGAR_FilingIndex.py\n')
+    _url = 'https://www.sec.gov/Archives/edgar/data/320193/0000320193-24-000123.txt'
+    index_url = filing_index_url(_url)
+    page = urlopen(Request(index_url, headers=General_Utilities.HTTP_HEADERS)).read()
+    page = gzip.decompress(page) if page[:2] == b'\x1f\x8b' else page
+    for doc in parse_filing_index(page.decode('utf-8', errors='ignore'), index_url):
+        print(doc)
+    print(time.strftime('%c'))
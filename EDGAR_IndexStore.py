@@ -0,0 +1,146 @@
+#!/usr/bin/python3
+"""
+    Consolidated, indexed store of EDGAR master indices
+    Every quarter in the local index cache (EDGAR_Pac.PARM_INDEX_CACHE) is loaded into
+      one SQLite table indexed on (cik, form, filing_date), so queries such as
+      "all 10-K and 10-Q filings for these CIKs between two dates" never scan a quarter.
+    sync() is incremental: a quarter is (re)loaded only when its cached master.idx
+      is new or has changed since the last sync.
+"""
+
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+import EDGAR_Pac
+
+
+STORE_NAME = 'index_store.sqlite'
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS filings (
+    cik          INTEGER NOT NULL,
+    form         TEXT    NOT NULL,
+    filing_date  INTEGER NOT NULL,
+    name         TEXT,
+    path         TEXT    NOT NULL,
+    year         INTEGER NOT NULL,
+    qtr          INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS filings_cik_form_date ON filings (cik, form, filing_date);
+CREATE INDEX IF NOT EXISTS filings_form_date ON filings (form, filing_date);
+CREATE INDEX IF NOT EXISTS filings_quarter ON filings (year, qtr);
+CREATE TABLE IF NOT EXISTS quarters (
+    year     INTEGER NOT NULL,
+    qtr      INTEGER NOT NULL,
+    mtime    REAL    NOT NULL,
+    bytes    INTEGER NOT NULL,
+    n_rows   INTEGER NOT NULL,
+    loaded   TEXT,
+    PRIMARY KEY (year, qtr)
+);
+'''
+
+
+class IndexStore:
+
+    def __init__(self, db_path=None, cache_dir=EDGAR_Pac.PARM_INDEX_CACHE):
+        self.cache_dir = cache_dir
+        self.db_path = db_path if db_path else os.path.join(cache_dir, STORE_NAME)
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def cached_quarters(self):
+        # (year, qtr, master.idx path) for every quarter present in the index cache
+        found = []
+        if not os.path.isdir(self.cache_dir):
+            return found
+        for year in sorted(os.listdir(self.cache_dir)):
+            if not year.isdigit():
+                continue
+            for qtr in range(1, 5):
+                idx_file = os.path.join(self.cache_dir, year, 'QTR' + str(qtr), 'master.idx')
+                if os.path.exists(idx_file):
+                    found.append((int(year), qtr, idx_file))
+        return found
+
+    def sync(self, flag=False):
+        # Load new or changed quarters from the index cache; returns the number of quarters loaded
+        loaded = dict(((year, qtr), (mtime, size)) for year, qtr, mtime, size in
+                      self.conn.execute('SELECT year, qtr, mtime, bytes FROM quarters'))
+        n_loaded = 0
+        for year, qtr, idx_file in self.cached_quarters():
+            stat = os.stat(idx_file)
+            if loaded.get((year, qtr)) == (stat.st_mtime, stat.st_size):
+                continue
+            start = time.time()
+            with open(idx_file, 'rb') as f:
+                n_rows = self.load_quarter(year, qtr, f.read(), stat.st_mtime, stat.st_size)
+            n_loaded += 1
+            if flag:
+                print('IndexStore.sync:  {0}:{1} | {2:,} rows | Time = {3:.2f} seconds'.
+                      format(year, qtr, n_rows, time.time() - start))
+        return n_loaded
+
+    def load_quarter(self, year, qtr, data, mtime=0.0, size=0):
+        # Replace one quarter's rows with the parsed contents of master.idx bytes
+        mi = EDGAR_Pac.parse_masterindex(data)
+        rows = zip(mi.cik.tolist(), mi.form, mi.filingdate.tolist(), mi.name, mi.path,
+                   [year] * len(mi), [qtr] * len(mi))
+        with self.conn:
+            self.conn.execute('DELETE FROM filings WHERE year = ? AND qtr = ?', (year, qtr))
+            self.conn.executemany('INSERT INTO filings VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+            self.conn.execute('INSERT OR REPLACE INTO quarters VALUES (?, ?, ?, ?, ?, ?)',
+                              (year, qtr, mtime, size, len(mi), time.strftime('%Y-%m-%d %H:%M:%S')))
+        return len(mi)
+
+    def query(self, ciks=None, forms=None, bgn_date=None, end_date=None):
+        # Filings matching every given filter, as a columnar EDGAR_Pac.MasterIndex
+        #   ciks, forms:  iterables (None = no filter);  dates:  YYYYMMDD ints, inclusive
+        # Large CIK sets go through a temporary table so the (cik, form, filing_date) index is used.
+        where = []
+        params = []
+        if ciks is not None:
+            self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS query_ciks (cik INTEGER PRIMARY KEY)')
+            self.conn.execute('DELETE FROM query_ciks')
+            self.conn.executemany('INSERT OR IGNORE INTO query_ciks VALUES (?)', ((int(c),) for c in ciks))
+            where.append('cik IN (SELECT cik FROM query_ciks)')
+        if forms is not None:
+            forms = list(forms)
+            where.append('form IN ({0})'.format(','.join('?' * len(forms))))
+            params.extend(forms)
+        if bgn_date is not None:
+            where.append('filing_date >= ?')
+            params.append(int(bgn_date))
+        if end_date is not None:
+            where.append('filing_date <= ?')
+            params.append(int(end_date))
+        sql = 'SELECT cik, name, form, filing_date, path FROM filings'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        rows = self.conn.execute(sql + ' ORDER BY filing_date, cik', params).fetchall()
+
+        columns = list(zip(*rows)) if rows else [(), (), (), (), ()]
+        strings = [np.array(col, dtype=object) for col in columns]
+        return EDGAR_Pac.MasterIndex(np.array(columns[0], dtype=np.int64), strings[1], strings[2],
+                                     np.array(columns[3], dtype=np.int32), strings[4])
+
+
+# Test routine:  sync the store with the index cache and time a sample query
+if __name__ == '__main__':
+    print('\n' + time.strftime('%c') + '\nND_SRAF:  Program EDGAR_IndexStore.py\n')
+    store = IndexStore()
+    print('{0} quarter(s) loaded.'.format(store.sync(True)))
+    start = time.time()
+    result = store.query(ciks=[320193, 789019], forms=['10-K', '10-Q'], bgn_date=20200101, end_date=20241231)
+    print('{0:,} filings | Time = {1:.4f} seconds'.format(len(result), time.time() - start))
+    store.close()
+    print(time.strftime('%c'))
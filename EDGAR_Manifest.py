@@ -0,0 +1,127 @@
+#!/usr/bin/python3
+"""
+    Persistent download manifest for EDGAR_DownloadForms
+    One SQLite row per filing, keyed by (accession path, duplicate number), where the
+      duplicate number is the same _N suffix download_forms appends to the file name.
+    Reruns skip filings whose row is 'done' and whose file is still on disk with the
+      recorded size; rows left 'started' (interrupted) or 'failed' are retried.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+
+MANIFEST_NAME = 'download_manifest.sqlite'
+
+STATUS_STARTED = 'started'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS downloads (
+    path      TEXT    NOT NULL,
+    seq       INTEGER NOT NULL,
+    url       TEXT    NOT NULL,
+    fname     TEXT    NOT NULL,
+    status    TEXT    NOT NULL,
+    bytes     INTEGER,
+    sha256    TEXT,
+    attempts  INTEGER NOT NULL DEFAULT 0,
+    error     TEXT,
+    updated   TEXT,
+    PRIMARY KEY (path, seq)
+);
+CREATE INDEX IF NOT EXISTS downloads_status ON downloads (status);
+'''
+
+
+def default_manifest_path(parm_path):
+    # Manifest lives in the root of the download tree
+    return os.path.join(parm_path, MANIFEST_NAME)
+
+
+class DownloadManifest:
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
+
+    def pending(self, jobs):
+        # jobs:  iterable of (url, fname, key) -> only those still needing a download
+        with self.lock:
+            done = {(path, seq): (fname, size) for path, seq, fname, size in self.conn.execute(
+                'SELECT path, seq, fname, bytes FROM downloads WHERE status = ?', (STATUS_DONE,))}
+        todo = []
+        for job in jobs:
+            _url, _fname, key = job
+            if key in done and done[key][0] == _fname:
+                try:
+                    if os.path.getsize(_fname) == done[key][1]:
+                        continue
+                except OSError:
+                    pass
+            todo.append(job)
+        return todo
+
+    def start(self, key, _url, _fname):
+        with self.lock:
+            self.conn.execute(
+                '''INSERT INTO downloads (path, seq, url, fname, status, attempts, updated)
+                   VALUES (?, ?, ?, ?, ?, 1, ?)
+                   ON CONFLICT (path, seq) DO UPDATE SET
+                     url = excluded.url, fname = excluded.fname, status = excluded.status,
+                     attempts = attempts + 1, updated = excluded.updated''',
+                (key[0], key[1], _url, _fname, STATUS_STARTED, time.strftime('%Y-%m-%d %H:%M:%S')))
+            self.conn.commit()
+
+    def finish(self, key, n_bytes, sha256):
+        with self.lock:
+            self.conn.execute('UPDATE downloads SET status = ?, bytes = ?, sha256 = ?, error = NULL, updated = ? '
+                              'WHERE path = ? AND seq = ?',
+                              (STATUS_DONE, n_bytes, sha256, time.strftime('%Y-%m-%d %H:%M:%S'), key[0], key[1]))
+            self.conn.commit()
+
+    def fail(self, key, error):
+        with self.lock:
+            self.conn.execute('UPDATE downloads SET status = ?, error = ?, updated = ? WHERE path = ? AND seq = ?',
+                              (STATUS_FAILED, error, time.strftime('%Y-%m-%d %H:%M:%S'), key[0], key[1]))
+            self.conn.commit()
+
+    def failed_jobs(self):
+        # Failed and interrupted downloads, as (url, fname, key) jobs ready to replay
+        with self.lock:
+            rows = self.conn.execute('SELECT url, fname, path, seq FROM downloads WHERE status != ? '
+                                     'ORDER BY path, seq', (STATUS_DONE,)).fetchall()
+        return [(_url, _fname, (path, seq)) for _url, _fname, path, seq in rows]
+
+    def summary(self):
+        with self.lock:
+            return dict(self.conn.execute('SELECT status, COUNT(*) FROM downloads GROUP BY status').fetchall())
+
+
+# Replay routine:  retry every failed or interrupted download recorded in a manifest
+if __name__ == '__main__':
+    import sys
+    import EDGAR_Downloader
+
+    print('\n' + time.strftime('%c') + '\nND_SRAF:  Program EDGAR_Manifest.py\n')
+    manifest = DownloadManifest(sys.argv[1])
+    print('Manifest: {0}'.format(manifest.summary()))
+    jobs = manifest.failed_jobs()
+    failed = EDGAR_Downloader.DownloadEngine(manifest=manifest).download(jobs)
+    print('{0:,} replayed | {1:,} still failing'.format(len(jobs), len(failed)))
+    print('Manifest: {0}'.format(manifest.summary()))
+    manifest.close()
+    print(time.strftime('%c'))
@@ -4,76 +4,190 @@
     ND-SRAF / McDonald : 201606
     https.//sraf.nd.edu
 """
-from urllib.request import Request
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from io import BytesIO
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+from zipfile import ZipFile
 
-def download_masterindex(year, qtr, flag=False):
+import EDGAR_Downloader
+
+
+PARM_ROOT_PATH = 'https://www.sec.gov/Archives/edgar/full-index/'
+# Local cache of quarterly master indices:  <cache>/<year>/QTR<n>/master.idx (+ .json validators)
+PARM_INDEX_CACHE = os.path.expanduser('~/Desktop/asg1/full-index/')
+PARM_INDEX_WORKERS = 4
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5'
+}
+
+# Shared by parallel index fetches so they stay within SEC's request rate
+_index_bucket = EDGAR_Downloader.TokenBucket(EDGAR_Downloader.PARM_MAX_RATE)
+
+
+def download_masterindex(year, qtr, flag=False, cache_dir=PARM_INDEX_CACHE):
     # Download Master.idx from EDGAR
     # Loop accounts for temporary server/ISP issues
     # ND-SRAF / McDonald : 201606
+    # cache_dir=None bypasses the local index cache
+    # Returns a list of MasterIndexRecord; use load_masterindex for the columnar form
 
-    import time
-    from urllib.request import urlopen
-    from zipfile import ZipFile
-    from io import BytesIO
+    start = time.time()  # Note: using clock time not CPU
+    masterindex = load_masterindex(year, qtr, cache_dir=cache_dir)
+    if masterindex is None:
+        return False
+    masterindex = list(masterindex)
 
-    number_of_tries = 3
-    sleep_time = 0.001  # Note sleep time accumulates according to err
+    if flag:
+        print('download_masterindex:  ' + str(year) + ':' + str(qtr) + ' | ' +
+      'len() = {:,}'.format(len(masterindex)) + ' | Time = {0:.4f}'.format(time.time() - start) +  # <-- Replace time.clock()
+      ' seconds')
+
+    return masterindex
 
 
-    PARM_ROOT_PATH = 'https://www.sec.gov/Archives/edgar/full-index/'
+def load_masterindex(year, qtr, forms=None, ciks=None, cache_dir=PARM_INDEX_CACHE, revalidate=True):
+    # Columnar master index for one quarter, optionally filtered to forms/ciks
+    # revalidate=False uses a cached open quarter as is (e.g. just refreshed by cache_masterindices)
+    # Returns a MasterIndex, or None if the index could not be downloaded
+    data = cached_masterindex(year, qtr, cache_dir, revalidate) if cache_dir else fetch_masterindex(year, qtr)[0]
+    if data is None:
+        return None
+    return parse_masterindex(data, forms, ciks)
+
+
+def fetch_masterindex(year, qtr, validators=None):
+    # Fetch and unzip master.zip for one quarter
+    # validators:  {'etag':..., 'last_modified':...} from a previous fetch -> conditional GET
+    # Returns (master.idx bytes, new validators); (None, validators) if unchanged (304);
+    #   (None, None) if the download failed
+
+    number_of_tries = 3
+    sleep_time = 0.001  # Note sleep time accumulates according to err
 
-    start = time.time()  # Note: using clock time not CPU
-    masterindex = []
     #  using the zip file is a little more complicated but orders of magnitude faster
     append_path = str(year) + '/QTR' + str(qtr) + '/master.zip'  # /master.idx => nonzip version
     sec_url = PARM_ROOT_PATH + append_path
 
-    sec_url = PARM_ROOT_PATH + append_path
-    
-    # Add headers
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5'
-    }
+    headers = dict(HEADERS)
+    if validators:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
 
     for i in range(1, number_of_tries + 1):
         try:
+            _index_bucket.acquire()
             req = Request(sec_url, headers=headers)
-            zipfile = ZipFile(BytesIO(urlopen(req).read())) 
-            records = zipfile.open('master.idx').read().decode('utf-8', 'ignore').splitlines()[10:]
+            with urlopen(req) as response:
+                zipfile = ZipFile(BytesIO(response.read()))
+                new_validators = {'etag': response.headers.get('ETag'),
+                                  'last_modified': response.headers.get('Last-Modified')}
+            return zipfile.open('master.idx').read(), new_validators
 #           records = urlopen(sec_url).read().decode('utf-8').splitlines()[10:] #  => nonzip version
-            break
+        except HTTPError as exc:
+            if exc.code == 304:
+                return None, validators
+            if exc.code in EDGAR_Downloader.THROTTLE_CODES:
+                _index_bucket.throttle(EDGAR_Downloader.parse_retry_after(exc.headers.get('Retry-After'), 1))
+            last_exc = exc
         except Exception as exc:
-            if i == 1:
-                print('\nError in download_masterindex')
-            print('  {0}. _url:  {1}'.format(i, sec_url))
-
-            print('  Warning: {0}  [{1}]'.format(str(exc), time.strftime('%c')))
-            if '404' in str(exc):
-                break
-            if i == number_of_tries:
-                return False
-            print('     Retry in {0} seconds'.format(sleep_time))
-            time.sleep(sleep_time)
-            sleep_time += sleep_time
-
-
-    # Load m.i. records into masterindex list
-    for line in records:
-        mir = MasterIndexRecord(line)
-        if not mir.err:
-            masterindex.append(mir)
+            last_exc = exc
+        if i == 1:
+            print('\nError in download_masterindex')
+        print('  {0}. _url:  {1}'.format(i, sec_url))
 
-    if flag:
-        print('download_masterindex:  ' + str(year) + ':' + str(qtr) + ' | ' +
-      'len() = {:,}'.format(len(masterindex)) + ' | Time = {0:.4f}'.format(time.time() - start) +  # <-- Replace time.clock()
-      ' seconds')
+        print('  Warning: {0}  [{1}]'.format(str(last_exc), time.strftime('%c')))
+        if '404' in str(last_exc) or i == number_of_tries:
+            break
+        print('     Retry in {0} seconds'.format(sleep_time))
+        time.sleep(sleep_time)
+        sleep_time += sleep_time
+
+    return None, None
+
+
+def quarter_is_closed(year, qtr, today=None):
+    # A quarter's index is final once the quarter is over (one week's grace for late postings)
+    today = today if today else date.today()
+    end_year, end_month = (year + 1, 1) if qtr == 4 else (year, 3 * qtr + 1)
+    return (today - date(end_year, end_month, 1)).days > 7
 
-    return masterindex
+
+def masterindex_cache_file(year, qtr, cache_dir=PARM_INDEX_CACHE):
+    # Where cached_masterindex keeps a quarter's master.idx
+    return os.path.join(cache_dir, str(year), 'QTR' + str(qtr), 'master.idx')
+
+
+def cached_masterindex(year, qtr, cache_dir=PARM_INDEX_CACHE, revalidate=True):
+    # Return master.idx bytes for a quarter from the local cache
+    # Closed quarters are never re-fetched; the open quarter is revalidated with ETag/If-Modified-Since
+    #   unless revalidate is False
+    idx_file = masterindex_cache_file(year, qtr, cache_dir)
+    meta_file = idx_file + '.json'
+
+    meta = None
+    if os.path.exists(idx_file) and os.path.exists(meta_file):
+        with open(meta_file, 'r') as f:
+            meta = json.load(f)
+        if meta.get('closed') or not revalidate:
+            with open(idx_file, 'rb') as f:
+                return f.read()
+
+    data, validators = fetch_masterindex(year, qtr, meta)
+    if data is None:
+        if validators is None and meta is None:
+            return None
+        if validators is not None:
+            # 304 Not Modified:  the quarter may have closed since the last fetch
+            validators['closed'] = quarter_is_closed(year, qtr)
+            validators['validated'] = time.strftime('%Y-%m-%d %H:%M:%S')
+            with open(meta_file, 'w') as f:
+                json.dump(validators, f)
+        # 304 Not Modified, or the server is unavailable and a stale copy is better than nothing
+        with open(idx_file, 'rb') as f:
+            return f.read()
+
+    os.makedirs(os.path.dirname(idx_file), exist_ok=True)
+    tmp_file = idx_file + '.part'
+    with open(tmp_file, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_file, idx_file)
+    validators['closed'] = quarter_is_closed(year, qtr)
+    validators['fetched'] = time.strftime('%Y-%m-%d %H:%M:%S')
+    with open(meta_file, 'w') as f:
+        json.dump(validators, f)
+    return data
+
+
+def cache_masterindices(bgn_year, end_year, bgn_qtr=1, end_qtr=4, cache_dir=PARM_INDEX_CACHE,
+                        n_workers=PARM_INDEX_WORKERS, store=None):
+    # Make sure every quarter in the range is cached, fetching the missing ones in parallel
+    # Quarters that have not started yet are skipped
+    # store:  optional EDGAR_IndexStore.IndexStore over cache_dir, synced with the new or changed quarters
+    # Returns {(year, qtr): master.idx bytes or None}
+    today = date.today()
+    quarters = [(year, qtr) for year in range(bgn_year, end_year + 1) for qtr in range(bgn_qtr, end_qtr + 1)
+                if date(year, 3 * qtr - 2, 1) <= today]
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        results = dict(zip(quarters, executor.map(lambda yq: cached_masterindex(yq[0], yq[1], cache_dir),
+                                                  quarters)))
+    if store is not None:
+        store.sync()
+    return results
 
 
 class MasterIndexRecord:
+    __slots__ = ('err', 'cik', 'name', 'form', 'filingdate', 'path')
+
     def __init__(self, line):
         self.err = False
         parts = line.split('|')
@@ -87,30 +201,145 @@ class MasterIndexRecord:
             self.err = True
         return
 
+    @classmethod
+    def from_fields(cls, cik, name, form, filingdate, path):
+        mir = cls.__new__(cls)
+        mir.err = False
+        mir.cik = cik
+        mir.name = name
+        mir.form = form
+        mir.filingdate = filingdate
+        mir.path = path
+        return mir
+
+
+class MasterIndex:
+    # Columnar master index:  parallel NumPy arrays, one entry per filing
+    #   cik (int64), name, form, path (object), filingdate (int32 YYYYMMDD)
+    # Iterating yields MasterIndexRecord objects for code that expects the row form.
+
+    def __init__(self, cik, name, form, filingdate, path):
+        self.cik = cik
+        self.name = name
+        self.form = form
+        self.filingdate = filingdate
+        self.path = path
+
+    def __len__(self):
+        return len(self.cik)
+
+    def __iter__(self):
+        for row in zip(self.cik.tolist(), self.name, self.form, self.filingdate.tolist(), self.path):
+            yield MasterIndexRecord.from_fields(*row)
+
+    @classmethod
+    def empty(cls):
+        import numpy as np
+        return cls(np.zeros(0, dtype=np.int64), np.empty(0, dtype=object), np.empty(0, dtype=object),
+                   np.zeros(0, dtype=np.int32), np.empty(0, dtype=object))
+
+    def take(self, mask):
+        # Subset by boolean mask or index array
+        return MasterIndex(self.cik[mask], self.name[mask], self.form[mask], self.filingdate[mask], self.path[mask])
+
+    def to_frame(self):
+        import pandas as pd
+        return pd.DataFrame({'cik': self.cik, 'name': self.name, 'form': self.form,
+                             'filingdate': self.filingdate, 'path': self.path})
+
+
+def parse_masterindex(data, forms=None, ciks=None, skip_lines=10):
+    # Vectorized parse of master.idx bytes into a MasterIndex
+    # Rows are located from newline/pipe positions over the whole buffer; the form and cik
+    #   filters are applied on the raw bytes, so only matching rows are ever turned into strings.
+    # Like MasterIndexRecord, lines without exactly 5 fields are dropped.
+    import numpy as np
+
+    buf = np.frombuffer(data, dtype=np.uint8)
+    n_buf = len(buf)
+    newlines = np.flatnonzero(buf == 10)
+    starts = np.concatenate(([0], newlines + 1))
+    if n_buf == 0 or len(starts) <= skip_lines:
+        return MasterIndex.empty()  # empty or header-only index
+    ends = np.concatenate((newlines, [n_buf]))
+    has_cr = (ends > starts) & (buf[np.maximum(ends - 1, 0)] == 13)
+    ends = ends - has_cr
+
+    # Pipes per line; a record line has exactly four
+    pipes = np.flatnonzero(buf == 124)
+    pipe_line = np.searchsorted(newlines, pipes)
+    n_pipes = np.bincount(pipe_line, minlength=len(starts))
+    rows = np.arange(skip_lines, len(starts))
+    rows = rows[n_pipes[rows] == 4]
+    first = np.searchsorted(pipe_line, rows)
+    p = pipes[first[:, None] + np.arange(4)]
+    starts, ends = starts[rows], ends[rows]
+
+    def field_equals(f_start, f_len, values):
+        keep = np.zeros(len(f_start), dtype=bool)
+        for value in values:
+            value = np.frombuffer(value.encode(), dtype=np.uint8)
+            idx = np.flatnonzero(f_len == len(value))
+            if len(idx) and len(value):
+                same = (buf[f_start[idx, None] + np.arange(len(value))] == value).all(axis=1)
+                keep[idx[same]] = True
+        return keep
+
+    def field_digits(f_start, f_len, width):
+        # Returns (int value, all-digits flag) for fields of at most `width` digits
+        value = np.zeros(len(f_start), dtype=np.int64)
+        ok = (f_len >= 1) & (f_len <= width)
+        for j in range(width):
+            inside = j < f_len
+            digit = buf[np.minimum(f_start + j, n_buf - 1)].astype(np.int64) - 48
+            ok &= ~inside | ((digit >= 0) & (digit <= 9))
+            value = np.where(inside, value * 10 + digit, value)
+        return value, ok
+
+    # Form filter
+    if forms is not None:
+        keep = field_equals(p[:, 1] + 1, p[:, 2] - p[:, 1] - 1, forms)
+        p, starts, ends = p[keep], starts[keep], ends[keep]
+
+    # CIK parse and filter
+    cik, ok = field_digits(starts, p[:, 0] - starts, 10)
+    if ciks is not None:
+        ok &= np.isin(cik, np.fromiter((int(c) for c in ciks), dtype=np.int64))
+    p, starts, ends, cik = p[ok], starts[ok], ends[ok], cik[ok]
+
+    # Filing date (YYYY-MM-DD) -> YYYYMMDD
+    d_start = p[:, 2] + 1
+    ok = p[:, 3] - d_start == 10
+    d_start = np.where(ok, d_start, 0)
+    ymd = buf[d_start[:, None] + np.array([0, 1, 2, 3, 5, 6, 8, 9])].astype(np.int32) - 48
+    ok &= ((ymd >= 0) & (ymd <= 9)).all(axis=1)
+    filingdate = ymd @ (10 ** np.arange(7, -1, -1)).astype(np.int32)
+    p, starts, ends, cik, filingdate = p[ok], starts[ok], ends[ok], cik[ok], filingdate[ok]
+
+    # Materialize the surviving text fields
+    def strings(f_start, f_end):
+        out = np.empty(len(f_start), dtype=object)
+        out[:] = [data[a:b].decode('utf-8', 'ignore') for a, b in zip(f_start.tolist(), f_end.tolist())]
+        return out
+
+    return MasterIndex(cik, strings(p[:, 0] + 1, p[:, 1]), strings(p[:, 1] + 1, p[:, 2]),
+                       filingdate.astype(np.int32), strings(p[:, 3] + 1, ends))
+
 
 def edgar_server_not_available(flag=False):
     # routine to run download only when EDGAR server allows bulk download.
     # see:  https://www.sec.gov/edgar/searchedgar/ftpusers.htm
-    # local time is converted to EST for check
-
-    from datetime import datetime as dt
-    import pytz
-    import time
+    # Sleeps until the window opens (at most 10 minutes per call) rather than a fixed 10 minutes
+    # EDGAR_Scheduler.WindowScheduler is the preferred way to hold downloads for the window
 
-    SERVER_BGN = 21  # Server opens at 9:00PM EST
-    SERVER_END = 6   # Server closes at 6:00AM EST
+    import EDGAR_Scheduler
 
-    # Get UTC time from local and convert to EST
-    utc_dt = pytz.utc.localize(dt.utcnow())
-    est_timezone = pytz.timezone('US/Eastern')
-    est_dt = est_timezone.normalize(utc_dt.astimezone(est_timezone))
-
-    if est_dt.hour >= SERVER_BGN or est_dt.hour < SERVER_END:
+    delay = EDGAR_Scheduler.BulkWindow().seconds_until_open()
+    if not delay:
         return False
-    else:
-        if flag:
-            print('\rSleeping: ' + str(dt.now()), end='', flush=True)
-        time.sleep(600)  # Sleep for 10 minutes
-        return True
+    if flag:
+        print('\rSleeping: ' + time.strftime('%c'), end='', flush=True)
+    time.sleep(min(delay, 600))
+    return True
 
 
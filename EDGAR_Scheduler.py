@@ -0,0 +1,186 @@
+#!/usr/bin/python3
+"""
+    Time-window-aware scheduler for EDGAR bulk downloads
+    SEC asks that bulk transfers run between 9 PM and 6 AM Eastern.  Rather than
+      polling the clock every 10 minutes (EDGAR_Pac.edgar_server_not_available),
+      WindowScheduler computes the exact opening and closing times:
+        - queued download jobs start the moment the window opens,
+        - when the window closes no new requests are issued and in-flight
+          requests are allowed to finish (drain); unstarted jobs stay queued,
+        - while the window is closed, queued offline work (index parsing,
+          scrubbing, tokenizing files already on disk) runs in its place.
+    WindowScheduler.download(jobs) has the same interface as
+      EDGAR_Downloader.DownloadEngine.download, so it is a drop-in replacement.
+    See:  https://www.sec.gov/os/accessing-edgar-data
+"""
+
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+from datetime import time as dtime
+from zoneinfo import ZoneInfo
+
+
+PARM_WINDOW_BGN = dtime(21, 0)  # Bulk window opens at 9:00 PM Eastern
+PARM_WINDOW_END = dtime(6, 0)   # ... and closes at 6:00 AM Eastern
+PARM_TIMEZONE = 'US/Eastern'
+PARM_MAX_SLEEP = 300            # Longest single sleep; re-checks the clock after suspend/clock changes
+
+
+class BulkWindow:
+    # Daily [bgn, end) window in a given time zone; may wrap past midnight
+
+    def __init__(self, bgn=PARM_WINDOW_BGN, end=PARM_WINDOW_END, tz=PARM_TIMEZONE, clock=None):
+        self.bgn = bgn
+        self.end = end
+        self.tz = ZoneInfo(tz)
+        self.clock = clock if clock else time.time  # seconds since the epoch
+
+    def now(self):
+        return datetime.fromtimestamp(self.clock(), self.tz)
+
+    def is_open(self, now=None):
+        t = (now if now else self.now()).timetz().replace(tzinfo=None)
+        if self.bgn <= self.end:
+            return self.bgn <= t < self.end
+        return t >= self.bgn or t < self.end
+
+    def _next(self, boundary, now):
+        # Next wall-clock occurrence of boundary strictly after now
+        candidate = datetime.combine(now.date(), boundary, tzinfo=self.tz)
+        if candidate <= now:
+            candidate = datetime.combine(now.date() + timedelta(days=1), boundary, tzinfo=self.tz)
+        return candidate
+
+    @staticmethod
+    def _seconds_between(earlier, later):
+        # Elapsed seconds; aware datetimes sharing a tzinfo subtract as wall-clock times, so a
+        #   night that crosses a DST change would be off by an hour without the UTC conversion
+        return (later.astimezone(timezone.utc) - earlier.astimezone(timezone.utc)).total_seconds()
+
+    def seconds_until_open(self, now=None):
+        # 0 if the window is open
+        now = now.astimezone(self.tz) if now else self.now()
+        return 0.0 if self.is_open(now) else self._seconds_between(now, self._next(self.bgn, now))
+
+    def seconds_until_close(self, now=None):
+        # 0 if the window is closed
+        now = now.astimezone(self.tz) if now else self.now()
+        return self._seconds_between(now, self._next(self.end, now)) if self.is_open(now) else 0.0
+
+
+def check_dst_nights():
+    # Window waits across the 2026 DST changes in US/Eastern; returns a list of mismatches
+    window = BulkWindow()
+    tz = window.tz
+    cases = [  # (now, method, expected seconds)
+        (datetime(2026, 10, 31, 23, 0, tzinfo=tz), window.seconds_until_close, 8 * 3600),   # fall back:  7 + 1 h
+        (datetime(2026, 3, 7, 23, 0, tzinfo=tz), window.seconds_until_close, 6 * 3600),     # spring forward:  7 - 1 h
+        (datetime(2026, 11, 1, 0, 30, tzinfo=tz), window.seconds_until_close, 6.5 * 3600),
+        (datetime(2026, 10, 31, 12, 0, tzinfo=tz), window.seconds_until_open, 9 * 3600),
+        (datetime(2026, 3, 8, 1, 0, tzinfo=timezone.utc), window.seconds_until_open, 3600),     # 8 PM EST given in UTC
+    ]
+    failures = []
+    for now, method, expected in cases:
+        got = method(now)
+        if got != expected:
+            failures.append('{0}({1}) = {2}, expected {3}'.format(method.__name__, now.isoformat(), got, expected))
+    return failures
+
+
+class WindowScheduler:
+
+    def __init__(self, engine, window=None, flag=True):
+        self.engine = engine            # EDGAR_Downloader.DownloadEngine
+        self.window = window if window else BulkWindow()
+        self.flag = flag                # print window transitions
+        self.offline = deque()          # (func, args) units of work that need no network
+        self.sleep = time.sleep
+
+    def add_offline(self, func, items=None):
+        # Queue offline work:  func() once, or func(item) for each item.
+        #   Each call is one unit; the clock is checked between units, so keep them small.
+        if items is None:
+            self.offline.append((func, ()))
+        else:
+            self.offline.extend((func, (item,)) for item in items)
+
+    def run_offline(self, until_open=True):
+        # Run queued offline units; with until_open, stop as soon as the window opens
+        n = 0
+        while self.offline and not (until_open and self.window.is_open()):
+            func, args = self.offline.popleft()
+            func(*args)
+            n += 1
+        return n
+
+    def wait_for_window(self):
+        # Do offline work, then sleep until the window opens exactly
+        n_offline = self.run_offline()
+        if n_offline and self.flag:
+            print('  {0:,} offline task(s) completed while the bulk window was closed.'.format(n_offline))
+        delay = self.window.seconds_until_open()
+        if delay and self.flag:
+            print('  Waiting {0} for the bulk window to open  [{1}]'.format(
+                timedelta(seconds=round(delay)), time.strftime('%c')))
+        while delay:
+            self.sleep(min(delay, PARM_MAX_SLEEP))
+            delay = self.window.seconds_until_open()
+
+    def download(self, jobs):
+        # jobs:  iterable of (url, fname) or (url, fname, manifest key)
+        # Blocks until every job has been attempted inside the window; returns the failed urls
+        pending = deque(jobs)
+        failed = []
+        n_inflight = self.engine.n_workers
+        with ThreadPoolExecutor(max_workers=n_inflight) as executor:
+            while pending:
+                self.wait_for_window()
+                inflight = set()
+                # Keep at most n_workers requests in flight so a close leaves little to drain
+                while pending or inflight:
+                    while pending and len(inflight) < n_inflight and self.window.is_open():
+                        self.engine.queued = len(pending)
+                        inflight.add(executor.submit(self.engine.download_one, *pending.popleft()))
+                    if not inflight:
+                        break
+                    # Wake at the close to stop submitting; once closed, block until the rest drain
+                    timeout = (self.window.seconds_until_close() or None) if pending else None
+                    done, inflight = wait(inflight, timeout=timeout, return_when=FIRST_COMPLETED)
+                    failed.extend(f.result() for f in done if f.result())
+                if pending and self.flag:
+                    print('  Bulk window closed; drained in-flight requests, {0:,} job(s) deferred  [{1}]'.
+                          format(len(pending), time.strftime('%c')))
+        return failed
+
+
+# Test routine
+if __name__ == '__main__':
+    print('\n' + time.strftime('%c') + '\nND_SRAF:  Program EDGAR_Scheduler.py\n')
+    dst_failures = check_dst_nights()
+    print('DST-night checks:  {0}'.format('; '.join(dst_failures) if dst_failures else 'OK'))
+    if dst_failures:
+        sys.exit(1)
+    window = BulkWindow()
+    print('Bulk window open now: {0} | opens in {1:,.0f} s | closes in {2:,.0f} s'.format(
+        window.is_open(), window.seconds_until_open(), window.seconds_until_close()))
+    # Window opening 3 seconds from now and lasting 4 seconds, against the local mock server
+    from Mock_EDGAR_Server import MockConfig, MockEDGARServer
+    import EDGAR_Downloader
+    import tempfile
+    server = MockEDGARServer(MockConfig(latency=0.2)).start()
+    now = datetime.now(ZoneInfo(PARM_TIMEZONE))
+    window = BulkWindow((now + timedelta(seconds=3)).timetz().replace(tzinfo=None),
+                        (now + timedelta(seconds=7)).timetz().replace(tzinfo=None))
+    scheduler = WindowScheduler(EDGAR_Downloader.DownloadEngine(n_workers=4, max_rate=10), window)
+    scheduler.add_offline(lambda i: time.sleep(0.1), range(10))
+    tmp = tempfile.mkdtemp()
+    jobs = [(server.base_url + 'Archives/edgar/data/{0}/0000000000-24-{0:06d}.txt'.format(i),
+             '{0}/{1}.txt'.format(tmp, i)) for i in range(30)]
+    start = time.time()
+    print('{0} failed | {1:.1f} seconds | {2}'.format(len(scheduler.download(jobs)),
+                                                       time.time() - start, server.stats()))
+    server.stop()
+    print(time.strftime('%c'))
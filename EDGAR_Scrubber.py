@@ -0,0 +1,173 @@
+"""
+Streaming scrubber for EDGAR full-submission .txt files.
+
+Generic_Parser.py and the parse2 family assume their input has been scrubbed. This
+  program produces that input:  it walks the <DOCUMENT>/<TYPE> structure of each
+  submission line by line and keeps only
+    1.  the SGML header (<SEC-HEADER> ... </SEC-HEADER>), and
+    2.  the primary document, i.e. the <DOCUMENT> whose <TYPE> equals the
+        submission type (10-K, 10-Q, ...), plus any types listed in KEEP_TYPES.
+  Exhibits, XBRL, graphics and uuencoded binaries are dropped, and HTML tags are
+  removed from the kept text.  Lines are read in bounded pieces, so memory use does
+  not depend on file size.
+
+The scrubbed tree mirrors SOURCE_ROOT under OUTPUT_ROOT with identical file names
+  (compressed inputs are written back with the same compression).
+"""
+
+import html
+import os
+import re
+import time
+from multiprocessing import Pool, cpu_count
+
+from tqdm import tqdm
+
+import Corpus_IO
+
+# === CONFIGURATION ===
+SOURCE_ROOT = os.path.expanduser('~/Desktop/asg1/data/')
+OUTPUT_ROOT = os.path.expanduser('~/Desktop/asg1/data_scrubbed/')
+KEEP_TYPES = ()            # Extra document types to keep, e.g. ('EX-13',) for annual reports
+PIECE_SIZE = 1 << 20       # Longest piece of a line read at once (HTML lines can be many MB)
+
+_TAG = re.compile(r'<[A-Za-z/!][^>]*>')
+_OPEN_TAG = re.compile(r'<[A-Za-z/!][^>]*$')
+_UU_BEGIN = re.compile(r'begin [0-7]{3,4} \S')
+
+
+# === Tag stripping that carries an unterminated tag over to the next piece ===
+def strip_tags(text, in_tag):
+    if in_tag:
+        end = text.find('>')
+        if end < 0:
+            return '', True
+        text = ' ' + text[end + 1:]
+    text = _TAG.sub(' ', text)
+    match = _OPEN_TAG.search(text)
+    if match:
+        text = text[:match.start()]
+        in_tag = True
+    elif text.endswith('<'):  # piece boundary fell right after '<'
+        text = text[:-1]
+        in_tag = True
+    else:
+        in_tag = False
+    return html.unescape(text), in_tag
+
+
+# === Core scrubber ===
+def scrub(f_in, f_out, keep_types=KEEP_TYPES, strip_html=True):
+    # Copy the SGML header and primary document(s) of one submission from f_in to f_out
+    # Returns (documents kept, documents dropped)
+    keep_types = set(t.upper() for t in keep_types)
+    submission_type = None
+    state = 'header'          # header -> doc_head -> text -> between -> doc_head ...
+    keep = False
+    in_uu = False
+    in_tag = False
+    at_line_start = True
+    n_kept = n_dropped = 0
+
+    for piece in iter(lambda: f_in.readline(PIECE_SIZE), ''):
+        line_start = at_line_start
+        at_line_start = piece.endswith('\n')
+        tag = piece.strip() if line_start else ''
+
+        if tag == '<DOCUMENT>':
+            state = 'doc_head'
+            keep = False
+            continue
+
+        if state in ('header', 'between'):
+            if state == 'header' and tag.startswith('CONFORMED SUBMISSION TYPE:'):
+                submission_type = tag.split(':', 1)[1].strip().upper()
+            f_out.write(piece)
+
+        elif state == 'doc_head':
+            if tag.startswith('<TYPE>'):
+                doc_type = tag[6:].strip().upper()
+                if submission_type is None:
+                    submission_type = doc_type  # no header: the first document is the primary one
+                keep = doc_type == submission_type or doc_type in keep_types
+                if keep:
+                    n_kept += 1
+                    f_out.write('<DOCUMENT>\n')
+                else:
+                    n_dropped += 1
+            elif tag.startswith('<TEXT>'):
+                state = 'text'
+                in_uu = in_tag = False
+            if keep:
+                f_out.write(piece)
+
+        else:  # state == 'text'
+            if tag == '</DOCUMENT>':
+                state = 'between'
+                if keep:
+                    f_out.write(piece)
+                continue
+            if not keep:
+                continue
+            if in_uu:
+                in_uu = tag != 'end'
+                continue
+            if line_start and _UU_BEGIN.match(piece):
+                in_uu = True
+                continue
+            if tag == '</TEXT>':
+                f_out.write(piece)
+                continue
+            if strip_html:
+                text, in_tag = strip_tags(piece, in_tag)
+                if at_line_start and not text.endswith('\n'):
+                    text += '\n'
+                f_out.write(text)
+            else:
+                f_out.write(piece)
+
+    return n_kept, n_dropped
+
+
+def scrub_file(in_path, out_path, keep_types=KEEP_TYPES):
+    # Scrub one submission into out_path (written to a temporary name, then renamed)
+    os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+    # Output keeps the input's compression suffix, so the temporary name goes in front of it
+    tmp_path = os.path.join(os.path.dirname(out_path), '.' + Corpus_IO.filing_basename(out_path) + '.part')
+    tmp_path = Corpus_IO.compressed_name(tmp_path, Corpus_IO.compression_of(out_path))
+    with Corpus_IO.open_filing(in_path) as f_in, Corpus_IO.open_filing_write(tmp_path) as f_out:
+        result = scrub(f_in, f_out, keep_types)
+    os.replace(tmp_path, out_path)
+    return result
+
+
+# === Worker ===
+def process_file(filepath):
+    try:
+        out_path = os.path.join(OUTPUT_ROOT, os.path.relpath(filepath, SOURCE_ROOT))
+        return scrub_file(filepath, out_path)
+    except Exception as e:
+        print(f"Error scrubbing {filepath}: {e}")
+        return 0, 0
+
+
+# === Main ===
+def main():
+    files = Corpus_IO.filing_glob(os.path.join(SOURCE_ROOT, '**/*.txt'))
+    print(f"Found {len(files)} .txt files to scrub.")
+
+    start_time = time.time()
+    n_kept = n_dropped = 0
+    with Pool(processes=cpu_count()) as pool:
+        for kept, dropped in tqdm(pool.imap_unordered(process_file, files, chunksize=8),
+                                  total=len(files), desc="Scrubbing"):
+            n_kept += kept
+            n_dropped += dropped
+
+    print(f"Kept {n_kept} documents, dropped {n_dropped} exhibits/attachments.")
+    print(f"Scrubbed files saved under: {OUTPUT_ROOT}")
+    print(f"Completed in {time.time() - start_time:.2f} seconds.")
+
+
+if __name__ == '__main__':
+    main()
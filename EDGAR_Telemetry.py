@@ -0,0 +1,125 @@
+#!/usr/bin/python3
+"""
+    Structured telemetry for the EDGAR download path
+    DownloadEngine reports every HTTP exchange and every retry to a Telemetry
+      object.  Each event is appended as one JSON line, e.g.
+        {"event": "request", "t": 1718000000.12, "url": "...", "status": 200,
+         "seconds": 0.231, "bytes": 184223, "attempt": 1, "queue": 812, "rate": 10.0}
+        {"event": "retry", "t": ..., "url": "...", "status": 429, "attempt": 1}
+      and summary(label) closes a reporting period (download_forms uses one per
+      quarter) with an {"event": "summary", ...} line holding the latency
+      histogram, percentiles, bytes, status and retry counts, queue depth and
+      effective request rate.
+    status is the HTTP status, or the exception name for transport errors.
+"""
+
+import json
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+
+# Upper edges (seconds) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_EDGES = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0)
+
+
+class Telemetry:
+
+    def __init__(self, path=None):
+        self.path = path          # JSON-lines file (appended), or None to aggregate only
+        self.f_out = open(path, 'a') if path else None
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.period_start = time.time()
+        self.latencies = []
+        self.statuses = Counter()
+        self.retries = Counter()
+        self.n_bytes = 0
+        self.queue_depths = []
+        self.min_rate = None
+
+    def _emit(self, record):
+        if self.f_out:
+            self.f_out.write(json.dumps(record) + '\n')
+
+    def request(self, _url, status, seconds, n_bytes=0, attempt=1, queue=None, rate=None):
+        # One HTTP exchange (or transport failure)
+        with self.lock:
+            self.latencies.append(seconds)
+            self.statuses[str(status)] += 1
+            self.n_bytes += n_bytes
+            if queue is not None:
+                self.queue_depths.append(queue)
+            if rate is not None:
+                self.min_rate = rate if self.min_rate is None else min(self.min_rate, rate)
+            self._emit({'event': 'request', 't': round(time.time(), 3), 'url': _url, 'status': status,
+                        'seconds': round(seconds, 4), 'bytes': n_bytes, 'attempt': attempt,
+                        'queue': queue, 'rate': round(rate, 3) if rate is not None else None})
+
+    def retry(self, _url, status, attempt):
+        # attempt failed with status and will be retried
+        with self.lock:
+            self.retries[str(status)] += 1
+            self._emit({'event': 'retry', 't': round(time.time(), 3), 'url': _url, 'status': status,
+                        'attempt': attempt})
+
+    def summary(self, label=''):
+        # Summarize and close the current period; returns the summary dict
+        with self.lock:
+            elapsed = max(time.time() - self.period_start, 1e-9)
+            lat = np.array(self.latencies) if self.latencies else np.zeros(0)
+            counts = np.bincount(np.searchsorted(LATENCY_EDGES, lat), minlength=len(LATENCY_EDGES) + 1)
+            summary = {'event': 'summary', 'label': label, 't': round(time.time(), 3),
+                       'seconds': round(elapsed, 3), 'requests': len(lat), 'bytes': self.n_bytes,
+                       'rate': round(len(lat) / elapsed, 3), 'bytes_per_sec': round(self.n_bytes / elapsed),
+                       'status': dict(self.statuses), 'retries': dict(self.retries),
+                       'latency_edges': list(LATENCY_EDGES), 'latency_hist': counts.tolist(),
+                       'latency_p50': None, 'latency_p95': None, 'latency_p99': None,
+                       'queue_max': max(self.queue_depths) if self.queue_depths else None,
+                       'queue_mean': round(float(np.mean(self.queue_depths)), 1) if self.queue_depths else None,
+                       'min_allowed_rate': self.min_rate}
+            if len(lat):
+                for p, value in zip((50, 95, 99), np.percentile(lat, [50, 95, 99])):
+                    summary['latency_p{0}'.format(p)] = round(float(value), 4)
+            self._emit(summary)
+            if self.f_out:
+                self.f_out.flush()
+            self._reset()
+        return summary
+
+    def close(self):
+        if self.f_out:
+            self.f_out.close()
+            self.f_out = None
+
+
+def format_summary(summary):
+    # One-line human-readable form of a summary dict
+    retries = sum(summary['retries'].values())
+    text = ('{0} | {1:,} requests | {2:.2f} req/s | {3:,.0f} KB/s | retries = {4:,} {5}'.
+            format(summary['label'], summary['requests'], summary['rate'], summary['bytes_per_sec'] / 1024,
+                   retries, summary['retries'] if retries else ''))
+    if summary['requests']:
+        text += ' | p50/p95/p99 = {0:.3f}/{1:.3f}/{2:.3f}s'.format(
+            summary['latency_p50'], summary['latency_p95'], summary['latency_p99'])
+    if summary['min_allowed_rate'] is not None:
+        text += ' | min rate = {0:.2f}/s'.format(summary['min_allowed_rate'])
+    return text
+
+
+# Test routine
+if __name__ == '__main__':
+    print('\n' + time.strftime('%c') + '\nND_SRAF:  Program EDGAR_Telemetry.py\n')
+    telemetry = Telemetry()
+    rng = np.random.default_rng(0)
+    for i, seconds in enumerate(rng.lognormal(-1.5, 0.8, 1000)):
+        status = 429 if i % 97 == 0 else 200
+        telemetry.request('url{0}'.format(i), status, seconds, 100_000, queue=1000 - i, rate=10.0)
+        if status == 429:
+            telemetry.retry('url{0}'.format(i), status, 1)
+    print(format_summary(telemetry.summary('test')))
+    print(time.strftime('%c'))
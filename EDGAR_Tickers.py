@@ -0,0 +1,105 @@
+#!/usr/bin/python3
+"""
+    Cached CIK <-> ticker resolver built on SEC's company_tickers.json
+    The mapping is kept on disk and only re-downloaded when older than
+      PARM_MAX_AGE_DAYS (or on request); if a refresh fails the cached copy is used.
+    Lookups are hash-indexed in both directions, and tickers() / ciks() map a whole
+      column (e.g. the CIK column of a master index) in one vectorized call.
+    When SEC lists several tickers for one CIK (share classes), the first listed
+      is used for CIK -> ticker, as the notebook's linear scan did.
+"""
+
+import json
+import os
+import time
+from urllib.request import Request, urlopen
+
+import numpy as np
+import pandas as pd
+
+
+PARM_URL = 'https://www.sec.gov/files/company_tickers.json'
+PARM_CACHE = os.path.expanduser('~/Desktop/asg1/company_tickers.json')
+PARM_MAX_AGE_DAYS = 7
+# SEC asks automated clients to identify themselves
+PARM_HEADERS = {'User-Agent': 'DRod/1.0 (dr1902@nyu.edu; For educational purposes)'}
+
+
+def fetch_company_tickers(cache_path=PARM_CACHE, max_age_days=PARM_MAX_AGE_DAYS, refresh=None, url=PARM_URL):
+    # company_tickers.json as a dict, from cache_path unless it is stale
+    # refresh:  None = by age, True = always download, False = never download
+    is_cached = os.path.exists(cache_path)
+    stale = not is_cached or time.time() - os.path.getmtime(cache_path) > max_age_days * 86400
+    if refresh or (refresh is None and stale):
+        try:
+            data = urlopen(Request(url, headers=PARM_HEADERS), timeout=60).read()
+            json.loads(data)  # never replace a good cache with a bad download
+            os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+            tmp_path = cache_path + '.part'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, cache_path)
+        except Exception as exc:
+            if not is_cached:
+                raise
+            print('  Warning: could not refresh {0} ({1}); using cached copy'.format(url, exc))
+    with open(cache_path, 'r') as f:
+        return json.load(f)
+
+
+class TickerResolver:
+
+    def __init__(self, cache_path=PARM_CACHE, max_age_days=PARM_MAX_AGE_DAYS, refresh=None, data=None):
+        # data:  an already-loaded company_tickers.json dict (skips the cache)
+        if data is None:
+            data = fetch_company_tickers(cache_path, max_age_days, refresh)
+        self.cik_to_ticker = {}
+        self.ticker_to_cik = {}
+        self.cik_to_title = {}
+        for company in data.values():
+            cik, ticker = int(company['cik_str']), company['ticker'].strip().upper()
+            self.cik_to_ticker.setdefault(cik, ticker)
+            self.ticker_to_cik.setdefault(ticker, cik)
+            self.cik_to_title.setdefault(cik, company.get('title'))
+        # Sorted arrays for vectorized lookups
+        self._ciks = np.array(sorted(self.cik_to_ticker), dtype=np.int64)
+        self._tickers = np.array([self.cik_to_ticker[cik] for cik in self._ciks], dtype=object)
+        self._ticker_index = pd.Index(list(self.ticker_to_cik))
+        self._ticker_ciks = np.array(list(self.ticker_to_cik.values()), dtype=np.int64)
+
+    def __len__(self):
+        return len(self.cik_to_ticker)
+
+    def ticker(self, cik):
+        return self.cik_to_ticker.get(int(cik))
+
+    def cik(self, ticker):
+        return self.ticker_to_cik.get(ticker.strip().upper())
+
+    def tickers(self, ciks):
+        # Ticker for each CIK in an array-like (None where unknown), as an object array
+        ciks = np.asarray(ciks, dtype=np.int64)
+        if not len(self._ciks):
+            return np.full(len(ciks), None, dtype=object)
+        pos = np.searchsorted(self._ciks, ciks).clip(0, len(self._ciks) - 1)
+        return np.where(self._ciks[pos] == ciks, self._tickers[pos], None)
+
+    def ciks(self, tickers):
+        # CIK for each ticker in an array-like (-1 where unknown), as an int64 array
+        pos = self._ticker_index.get_indexer(pd.Index([str(t).strip().upper() for t in tickers]))
+        return np.where(pos >= 0, self._ticker_ciks[pos], -1)
+
+
+# Test routine
+if __name__ == '__main__':
+    print('\n' + time.strftime('%c') + '\nND_SRAF:  Program EDGAR_Tickers.py\n')
+    sample = {'0': {'cik_str': 320193, 'ticker': 'AAPL', 'title': 'Apple Inc.'},
+              '1': {'cik_str': 1652044, 'ticker': 'GOOGL', 'title': 'Alphabet Inc.'},
+              '2': {'cik_str': 1652044, 'ticker': 'GOOG', 'title': 'Alphabet Inc.'}}
+    resolver = TickerResolver(data=sample)
+    ciks = np.random.default_rng(0).choice([320193, 1652044, 12345], 2_000_000)
+    start = time.time()
+    tickers = resolver.tickers(ciks)
+    print('{0:,} CIKs resolved in {1:.3f} seconds: {2}'.format(len(ciks), time.time() - start, tickers[:5]))
+    print(resolver.ciks(['goog', 'AAPL', 'XXXX']), resolver.ticker(1652044), resolver.cik('GOOGL'))
+    print(time.strftime('%c'))
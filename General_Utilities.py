@@ -6,21 +6,35 @@
 """
 
 
+import codecs
+import hashlib
+import itertools
+import os
+import tempfile
 import time
+import zlib
+import Corpus_IO
 #from urllib.request import urlretrieve
 from urllib.request import urlopen
 from urllib.request import urlretrieve, Request
 import time
 
 
-def download_to_file(_url, _fname, _f_log=None):
+HTTP_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Accept-Encoding": "gzip",
+}
+
+CHUNK_SIZE = 1 << 16  # Bytes read (and at most produced by gunzip) per step; bounds memory per download
+
+
+def download_to_file(_url, _fname, _f_log=None, compress=None):
     # download file from 'url' and write to '_fname'
+    # compress:  None, 'gzip' or 'zstd' -> stored compressed (see Corpus_IO)
     # Loop accounts for temporary server/ISP issues
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.5",
-    }
+    headers = HTTP_HEADERS
 
     number_of_tries = 3
     sleep_time = 0.01  # Note sleep time accumulates according to err
@@ -29,8 +43,7 @@ def download_to_file(_url, _fname, _f_log=None):
         try:
             req = Request(_url, headers=headers)
             with urlopen(req) as response:
-                with open(_fname, 'wb') as f_out:
-                    f_out.write(response.read())
+                stream_to_file(response, _fname, compress=compress)
             return
         except Exception as exc:
             if i == 1:
@@ -44,6 +57,13 @@ def download_to_file(_url, _fname, _f_log=None):
             time.sleep(sleep_time)
             sleep_time += sleep_time
 
+    log_download_error(_url, _fname, _f_log)
+
+    return
+
+
+def log_download_error(_url, _fname, _f_log=None):
+    # Report a failed download to stdout and, if given, the log file
     print('\n  ERROR:  Download failed for')
     print('          url:  {0}'.format(_url))
     print('          _fname:  {0}'.format(_fname))
@@ -53,11 +73,12 @@ def download_to_file(_url, _fname, _f_log=None):
         _f_log.write('  |  _fname: {0}'.format(_fname))
         _f_log.write('  |  {0}\n'.format(time.strftime('%c')))
 
-    return
-
 
-def download_to_doc(_url, _f_log=None):
+def download_to_doc(_url, _f_log=None, incremental=False):
     # Download url content to string doc
+    #   incremental=True returns a generator of decoded text chunks instead.  The first chunk
+    #   is read inside the retry loop; an error while reading the rest of the body is not
+    #   retried (the caller has already consumed part of it) but is logged and raised.
     # Loop accounts for temporary server/ISP issues
 
     number_of_tries = 3
@@ -65,8 +86,14 @@ def download_to_doc(_url, _f_log=None):
 
     for i in range(1, number_of_tries + 1):
         try:
-            doc = urlopen(_url).read().decode('utf-8', errors='ignore')
-            return
+            response = urlopen(Request(_url, headers=HTTP_HEADERS))
+            if incremental:
+                chunks = iter_text(response)
+                first = next(chunks, '')
+                return _log_body_errors(itertools.chain([first], chunks), _url, _f_log)
+            with response:
+                doc = ''.join(iter_text(response))
+            return doc
         except Exception as exc:
             if i == 1:
                 print('\n==>urlopen error in download_to_doc.py')
@@ -86,6 +113,90 @@ def download_to_doc(_url, _f_log=None):
     return None
 
 
+def _log_body_errors(chunks, _url, _f_log=None):
+    # Pass the chunks through; an error part-way through the body is logged, then raised
+    try:
+        yield from chunks
+    except Exception as exc:
+        print('\n  ERROR:  Download interrupted for url: {0}  ({1})'.format(_url, exc))
+        if _f_log:
+            _f_log.write('ERROR:  Download interrupted=>  _url: {0:75}'.format(_url))
+            _f_log.write('  |  {0}  |  {1}\n'.format(exc, time.strftime('%c')))
+        raise
+
+
+def iter_body(response, chunk_size=CHUNK_SIZE):
+    # Yield the response body in chunks of at most chunk_size bytes
+    # gzip Content-Encoding is decompressed on the fly; a body shorter than
+    #   Content-Length raises IOError instead of passing as complete.
+    encoding = (response.headers.get('Content-Encoding') or '').strip().lower()
+    expected = response.headers.get('Content-Length')
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if encoding in ('gzip', 'x-gzip') else None
+    n_raw = 0
+    while True:
+        block = response.read(chunk_size)
+        if not block:
+            break
+        n_raw += len(block)
+        if not decompressor:
+            yield block
+            continue
+        data = decompressor.decompress(block, chunk_size)
+        while data:
+            yield data
+            data = decompressor.decompress(decompressor.unconsumed_tail, chunk_size)
+    if expected is not None and n_raw != int(expected):
+        raise IOError('Incomplete download: {0:,} of {1:,} bytes'.format(n_raw, int(expected)))
+    if decompressor:
+        data = decompressor.flush()
+        if data:
+            yield data
+        if not decompressor.eof:
+            raise IOError('Incomplete download: truncated gzip stream')
+
+
+def iter_text(response, chunk_size=CHUNK_SIZE):
+    # Yield the response body as utf-8 text chunks (multi-byte characters may straddle chunks)
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+    with response:
+        for block in iter_body(response, chunk_size):
+            text = decoder.decode(block)
+            if text:
+                yield text
+        text = decoder.decode(b'', final=True)
+        if text:
+            yield text
+
+
+def stream_to_file(response, _fname, chunk_size=CHUNK_SIZE, compress=None):
+    # Stream the response body to a temporary file next to _fname, then rename it into place,
+    #   so an interrupted download never leaves a truncated _fname behind.
+    # compress:  None, 'gzip' or 'zstd' (see Corpus_IO); _fname should carry the matching suffix
+    # Returns (bytes on disk, sha256 hex digest of the uncompressed content)
+    return write_blocks(iter_body(response, chunk_size), _fname, compress)
+
+
+def write_blocks(blocks, _fname, compress=None):
+    # Atomically write an iterable of byte blocks to _fname; same contract as stream_to_file
+    sha = hashlib.sha256()
+    fd, tmp_name = tempfile.mkstemp(prefix='.' + os.path.basename(_fname) + '.', suffix='.part',
+                                    dir=os.path.dirname(_fname) or '.')
+    try:
+        with Corpus_IO.compressing_writer(os.fdopen(fd, 'wb'), compress) as f_out:
+            for block in blocks:
+                f_out.write(block)
+                sha.update(block)
+        n_bytes = os.path.getsize(tmp_name)
+        os.replace(tmp_name, _fname)
+    except BaseException:
+        try:
+            os.remove(tmp_name)
+        except OSError:
+            pass
+        raise
+    return n_bytes, sha.hexdigest()
+
+
 # Test routine
 if __name__ == '__main__':
     # Note:  This test is setup to throw errors
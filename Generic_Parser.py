@@ -6,7 +6,7 @@ The program assumes the input files have been scrubbed,
 
 Dependencies:
     Python:  Load_MasterDictionary.py
-    Data:    LoughranMcDonald_MasterDictionary_2014.csv
+    Data:    LoughranMcDonald_MasterDictionary_2024.csv (compiled on first use)
 
 The program outputs:
    1.  File name
@@ -33,14 +33,16 @@ The program outputs:
 """
 
 import csv
-import glob
 import os
 import re
 import string
 import sys
 import time
+import numpy as np
 #sys.path.append('D:\GD\Python\TextualAnalysis\Modules')  # Modify to identify path for custom modules
-import MOD_Load_MasterDictionary_v2023 as LM
+import Load_MasterDictionary as LM
+import Corpus_IO
+import Corpus_Pack
 
 from tqdm import tqdm
 
@@ -51,9 +53,16 @@ from tqdm import tqdm
 # User defined directory for files to be parsed
 TARGET_FILES = os.path.expanduser('~/Desktop/asg1/data/**/*.txt')
 
+# Alternatively, read filings from a Corpus_Pack pack (set to None to use TARGET_FILES)
+PACK_DIR = None  # e.g. os.path.expanduser('~/Desktop/asg1/data_pack/')
+PACK_PATTERN = '**/*.txt'
+
 # User defined file pointer to LM dictionary
 MASTER_DICTIONARY_FILE = os.path.expanduser('~/Desktop/asg1/LoughranMcDonald_MasterDictionary_2024.csv')
 
+# Characters read at a time, so memory stays bounded on very large filings (None = whole file)
+CHUNK_SIZE = Corpus_IO.CHUNK_SIZE
+
 # User defined output file
 OUTPUT_FILE = os.path.expanduser('~/Desktop/asg1/results/parser_output.csv')
 
@@ -68,70 +77,122 @@ OUTPUT_FIELDS = [
 
 lm_dictionary = LM.load_masterdictionary(MASTER_DICTIONARY_FILE, True)
 
+# Counting kernel inputs, indexed by word id:  the ids of countable words (not all digits,
+#   longer than one character) and one weight column per summed quantity -- the eight
+#   category flags in OUTPUT_FIELDS order (LM.CATEGORIES), syllables, word length
+lm_ids = {word: i for word, i in lm_dictionary.ids.items() if not word.isdigit() and len(word) > 1}
+lm_weights = np.column_stack([(lm_dictionary.flags >> bit) & 1 for bit in range(len(LM.CATEGORIES))] +
+                             [lm_dictionary.syllables, [len(word) for word in lm_dictionary.words]]
+                             ).astype(np.int64)
+
+# Fused scanner for normalized documents (upper case, May removed).  One regex pass returns
+#   each \w+ token (the same tokens as re.findall('\w+')) and, in place of its digits, an empty
+#   string per number.  A number is what the original count found after dropping . or , before
+#   a digit and blanking punctuation:  a digit run, joined through those dropped separators,
+#   with no letter or digit on either side ('_' was punctuation).  Only a token holding '_' is
+#   split around such a number, into pieces that hold '_' or start with a digit, so the
+#   dictionary must have no such words (checked below; otherwise get_data uses the original
+#   passes).  check_scanner_cases() tests this on SCANNER_CASES.
+_NUMBER = (r'\d(?<![^\W_]\d)(?:(?<![^\W_][.,]\d)|(?<![0-9]))'  # nothing word-like before, even across a dropped . or ,
+           r'\d*+(?:[.,](?=[0-9])\d++)*+(?![^\W_])')
+_TOKEN = r'(?=\w)(?:[^\W_]++)?(?:_++[^\W\d_][^\W_]*+)*+_*+'  # a \w+ token, stopping before '_<digit>'
+_SCAN = re.compile('(?:' + _NUMBER + ')|(' + _TOKEN + ')')
+_fused_scan = not any('_' in word or word[0].isdigit() for word in lm_ids)
+
 def main():
 
     f_out = open(OUTPUT_FILE, 'w')
     wr = csv.writer(f_out, lineterminator='\n')
     wr.writerow(OUTPUT_FIELDS)
 
-    file_list = glob.glob(TARGET_FILES, recursive = True)
+    if PACK_DIR:
+        file_list = Corpus_Pack.list_filings(PACK_DIR, PACK_PATTERN)
+    else:
+        file_list = Corpus_IO.filing_glob(TARGET_FILES)
 
     for filename in tqdm(file_list):
-        with open(filename, 'r', encoding='UTF-8', errors='ignore') as f_in:
-            doc = f_in.read()
-        doc_len = len(doc)
-        doc = re.sub('(May|MAY)', ' ', doc)  # drop all May month references
-        doc = doc.upper()  # for this parse caps aren't informative so shift
+        output_data, doc_len = stream_data(filename, CHUNK_SIZE)  # plain, .gz or .zst
 
-        output_data = get_data(doc)
-
-        fname = os.path.basename(filename)
+        fname = Corpus_IO.filing_basename(filename)
 
         CIK = fname.split('_')[0]
         """
             Leave only basic filename for joining meta information
         """
         #output_data[0] = filename
-        clean_filename  = filename.split('/')[-1].rstrip('.mda')
+        clean_filename  = fname.rstrip('.mda')
         output_data[0]  = clean_filename
         output_data[1]  = doc_len
         output_data[-1] = CIK
         wr.writerow(output_data)
 
 
-def get_data(doc):
+def normalize(doc):
+    # Same text as re.sub('(May|MAY)', ' ', doc).upper():  the two patterns cannot overlap
+    doc = doc.replace('May', ' ').replace('MAY', ' ')  # drop all May month references
+    return doc.upper()  # for this parse caps aren't informative so shift
+
+
+def char_counts(doc):
+    # (number of A-Z, number of 0-9) in one counting pass
+    if doc.isascii():
+        counts = np.bincount(np.frombuffer(doc.encode('ascii'), dtype=np.uint8), minlength=128)
+        return int(counts[65:91].sum()), int(counts[48:58].sum())
+    return sum(doc.count(c) for c in string.ascii_uppercase), sum(doc.count(c) for c in string.digits)
+
+
+def scan_counts(doc, fused=True):
+    # Additive statistics of a normalized document, or of one piece of it from Corpus_IO.iter_chunks:
+    #   [count per word id, # of A-Z, # of 0-9, # of numbers]
+    if fused and _fused_scan:
+        tokens = _SCAN.findall(doc)  # \w+ tokens, '' for each number
+        n_letters, n_digits = char_counts(doc)
+        n_numbers = tokens.count('')
+    else:
+        tokens = re.findall('\w+', doc)  # Note that \w+ splits hyphenated words
+        n_letters = len(re.findall('[A-Z]', doc))
+        n_digits = len(re.findall('[0-9]', doc))
+        # drop punctuation within numbers for number count
+        doc = re.sub('(?!=[0-9])(\.|,)(?=[0-9])', '', doc)
+        doc = doc.translate(str.maketrans(string.punctuation, " " * len(string.punctuation)))
+        n_numbers = len(re.findall(r'\b[-+\(]?[$€£]?[-+(]?\d+\)?\b', doc))
+
+    # Resolve each token to a word id once and count ids
+    ids = [i for i in map(lm_ids.get, tokens) if i is not None]
+    return [np.bincount(np.array(ids, dtype=np.intp), minlength=len(lm_weights)), n_letters, n_digits, n_numbers]
+
+
+def get_data(doc, fused=True):
+    return data_from_counts(*scan_counts(doc, fused))
+
+
+def stream_data(filename, chunk_size=CHUNK_SIZE, fused=True):
+    # get_data() for a filing read chunk by chunk:  (output data, document length);
+    #   memory is O(chunk_size + dictionary size) however large the filing
+    doc_len, stats = 0, scan_counts('', fused)
+    for chunk in Corpus_IO.iter_chunks(filename, chunk_size):
+        doc_len += len(chunk)
+        stats = [total + part for total, part in zip(stats, scan_counts(normalize(chunk), fused))]
+    return data_from_counts(*stats), doc_len
+
+
+def data_from_counts(counts, n_letters, n_digits, n_numbers):
 
-    vdictionary = {}
     _odata = [0] * 18 # Modified for CIK
-    total_syllables = 0
-    word_length = 0
-
-    tokens = re.findall('\w+', doc)  # Note that \w+ splits hyphenated words
-    for token in tokens:
-        if not token.isdigit() and len(token) > 1 and token in lm_dictionary:
-            _odata[2] += 1  # word count
-            word_length += len(token)
-            if token not in vdictionary:
-                vdictionary[token] = 1
-            if lm_dictionary[token].Negative: _odata[3] += 1
-            if lm_dictionary[token].Positive: _odata[4] += 1
-            if lm_dictionary[token].Uncertainty: _odata[5] += 1
-            if lm_dictionary[token].Litigious: _odata[6] += 1
-            if lm_dictionary[token].Strong_Modal: _odata[7] += 1  # Updated attribute
-            if lm_dictionary[token].Weak_Modal: _odata[8] += 1    # Updated attribute
-            if lm_dictionary[token].Constraining: _odata[9] += 1
-            if lm_dictionary[token].Complexity: _odata[10] += 1   # New category
-            total_syllables += lm_dictionary[token].Syllables
-
-    _odata[11] = len(re.findall('[A-Z]', doc))
-    _odata[12] = len(re.findall('[0-9]', doc))
-    # drop punctuation within numbers for number count
-    doc = re.sub('(?!=[0-9])(\.|,)(?=[0-9])', '', doc)
-    doc = doc.translate(str.maketrans(string.punctuation, " " * len(string.punctuation)))
-    _odata[13] = len(re.findall(r'\b[-+\(]?[$€£]?[-+(]?\d+\)?\b', doc))
+
+    # Sum every weight column over the words that occur in one product
+    vocabulary = np.flatnonzero(counts)
+    totals = (counts[vocabulary] @ lm_weights[vocabulary]).tolist()
+    _odata[2] = int(counts.sum())  # word count
+    _odata[3:11] = totals[:8]
+    total_syllables, word_length = totals[8], totals[9]
+
+    _odata[11] = n_letters
+    _odata[12] = n_digits
+    _odata[13] = n_numbers
     _odata[14] = total_syllables / _odata[2]
     _odata[15] = word_length / _odata[2]
-    _odata[16] = len(vdictionary)
+    _odata[16] = len(vocabulary)
 
     # Convert counts to %
     for i in range(3, 10 + 1):
@@ -141,7 +202,73 @@ def get_data(doc):
     return _odata
 
 
+def check_scanner(file_list, max_files=None, chunk_size=1 << 16):
+    # Equivalence check:  normalize(), the fused get_data() and stream_data() in small chunks
+    #   against the original whole-document passes
+    mismatches = 0
+    for filename in tqdm(file_list[:max_files]):
+        doc = Corpus_IO.read_filing(filename)
+        legacy_doc = re.sub('(May|MAY)', ' ', doc).upper()
+        results = []
+        for run in (lambda: get_data(normalize(doc)), lambda: stream_data(filename, chunk_size)[0],
+                    lambda: get_data(legacy_doc, fused=False)):
+            try:
+                results.append(run())
+            except ZeroDivisionError as e:  # no dictionary words:  all must fail alike
+                results.append(repr(e))
+        fused, streamed, legacy = results
+        if normalize(doc) != legacy_doc or fused != legacy or streamed != legacy:
+            mismatches += 1
+            print('\nMismatch in {0}:\n  fused    {1}\n  streamed {2}\n  legacy   {3}'.
+                  format(filename, fused, streamed, legacy))
+    print('\n{0} of {1} files differ.'.format(mismatches, len(file_list[:max_files])))
+    return mismatches
+
+
+# Edge cases for the fused scanner:  '_' next to digits, separators inside and around numbers,
+#   May/MAY, and non-ASCII letters, digits and case mappings
+SCANNER_CASES = [
+    '_1', '1_', 'A_1', 'A_1B', '_A1_', 'A__1__B', '1_000', 'X_9.5 Y_', 'LOSS_2024 2024_LOSS',
+    '1,000.5', '$1,000,000', '(1,234)', '-12.5%', '1.2.3', '.5', '5.', ',5', '1,,2', '1.,2',
+    'A1,000', '1,000A', 'A.1', '1.A', 'V2.0', '10-K', '2024-12-31', '3rd', 'Q4', 'A1B2',
+    'May', 'MAY', 'may', 'Mayor', 'MAYBE', 'dismay', 'MayMAY', 'LOSS MAY 2024', 'Ma y',
+    'Café 12', 'naïve LOSS', 'ÉTÉ 3,5', '１２３ LOSS', 'LOSS ٣', 'straße', 'ﬁnancial loss', 'Ⅻ', 'x²',
+    '€1,000', '£5', 'µ', 'LOSS—GAIN', 'LOSS\u00a0GAIN 1\u00a0000', 'loss\tgain\n12\r\n',
+    '', '   ', '___', '...', 'A',
+]
+
+
+def _countable(token):
+    # Could be a dictionary word under the _fused_scan guard (see lm_ids)
+    return len(token) > 1 and '_' not in token and not token[0].isdigit()
+
+
+def check_scanner_cases(cases=SCANNER_CASES):
+    # Self-check on SCANNER_CASES (each alone and all joined):  normalize() and scan_counts()
+    #   must match the original passes, and the fused scan must yield the same tokens as
+    #   re.findall('\w+') among those any allowed dictionary could hold, whatever its words
+    mismatches = 0
+    for doc in cases + [' '.join(cases), ''.join(cases)]:
+        legacy_doc = re.sub('(May|MAY)', ' ', doc).upper()
+        fused_tokens = [t for t in _SCAN.findall(legacy_doc) if _countable(t)]
+        legacy_tokens = [t for t in re.findall('\w+', legacy_doc) if _countable(t)]
+        fused = scan_counts(normalize(doc))
+        legacy = scan_counts(legacy_doc, fused=False)
+        if (normalize(doc) != legacy_doc or fused_tokens != legacy_tokens or fused[1:] != legacy[1:] or
+                not np.array_equal(fused[0], legacy[0])):
+            mismatches += 1
+            print('Scanner mismatch on {0!r}:\n  fused    {1} {2}\n  legacy   {3} {4}'.
+                  format(doc, fused_tokens, fused[1:], legacy_tokens, legacy[1:]))
+    return mismatches
+
+
 if __name__ == '__main__':
     print('\n' + time.strftime('%c') + '\nGeneric_Parser.py\n')
-    main()
+    if check_scanner_cases():
+        sys.exit('Fused scanner disagrees with the original passes (see above).')
+    if '--check' in sys.argv:  # python Generic_Parser.py --check:  compare scanners on TARGET_FILES
+        check_scanner(Corpus_Pack.list_filings(PACK_DIR, PACK_PATTERN) if PACK_DIR
+                      else Corpus_IO.filing_glob(TARGET_FILES))
+    else:
+        main()
     print('\n' + time.strftime('%c') + '\nNormal termination.')
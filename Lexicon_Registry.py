@@ -0,0 +1,111 @@
+"""
+Scoring one tokenization of a filing against several word lists at once.
+
+parse2.py (all LM words), results/parse_byYear.py (LM negatives) and parse_by_h.py
+  (Harvard IV negatives) each tokenize the whole corpus to count one word set.  A
+  LexiconRegistry gives every word of every registered list one id in a shared token-id
+  space and keeps a word x lexicon membership matrix, so score() tokenizes a filing once,
+  counts token ids once (np.bincount), and returns the rows each of those scripts would
+  have produced -- [filename, cik, word, tf_ij, a_j], words in order of first appearance --
+  for every lexicon.  parse_lexicons.py runs it over the corpus.
+"""
+
+import re
+import time
+
+import numpy as np
+
+import Load_MasterDictionary as LM
+
+
+_TOKEN = re.compile(r'\b[A-Z]{2,}\b')  # same tokens as the parse2 family
+
+
+def load_word_list(path):
+    # Custom list:  one word per line; blank lines and lines starting with # are skipped
+    with open(path, 'r', encoding='utf-8') as f:
+        return set(line.strip().upper() for line in f if line.strip() and not line.startswith('#'))
+
+
+class LexiconRegistry:
+
+    def __init__(self):
+        self.ids = {}          # word -> token id
+        self.words = []        # token id -> word
+        self.names = []        # registered lexicons, in registration order
+        self._members = []     # per lexicon, the token ids of its words
+        self._matrix = None
+
+    def register(self, name, words):
+        # Add a word list under name; words are upper-cased as the tokenizer does
+        if name in self.names:
+            raise ValueError(f"Lexicon {name!r} is already registered")
+        members = []
+        for word in words:
+            word = str(word).upper()
+            if word not in self.ids:
+                self.ids[word] = len(self.words)
+                self.words.append(word)
+            members.append(self.ids[word])
+        self.names.append(name)
+        self._members.append(np.unique(np.array(members, dtype=np.intp)))
+        self._matrix = None
+        return self
+
+    def register_lm(self, path, categories=(None,), prefix='LM'):
+        # LM master dictionary lexicons from the compiled artifact:  None = every word ('LM'),
+        #   else one lexicon per category ('LM_negative', ...); word sets match parse2.py's
+        for category in categories:
+            name = prefix if category is None else f"{prefix}_{category}"
+            self.register(name, LM.category_words(path, category, pandas_na=True))
+        return self
+
+    @property
+    def matrix(self):
+        # Boolean (word id, lexicon) membership matrix
+        if self._matrix is None or self._matrix.shape != (len(self.words), len(self.names)):
+            self._matrix = np.zeros((len(self.words), len(self.names)), dtype=bool)
+            for k, members in enumerate(self._members):
+                self._matrix[members, k] = True
+        return self._matrix
+
+    def count(self, chunks):
+        # (token ids in order of first appearance, their counts) for every registered word in the
+        #   text given as pieces (Corpus_IO.iter_chunks); only one piece's tokens are held at a time
+        first_seen = {}
+        counts = np.zeros(len(self.words), dtype=np.int64)
+        for chunk in chunks:
+            ids = [i for i in map(self.ids.get, _TOKEN.findall(chunk.upper())) if i is not None]
+            first_seen.update(dict.fromkeys(ids))
+            counts += np.bincount(np.array(ids, dtype=np.intp), minlength=len(self.words))
+        order = np.fromiter(first_seen, dtype=np.intp, count=len(first_seen))
+        return order, counts[order]
+
+    def score(self, text, filename):
+        # {lexicon: rows} with the parse2 row layout; lexicons with no matches get []
+        return self.score_chunks([text], filename)
+
+    def score_chunks(self, chunks, filename):
+        # score() of the joined chunks
+        order, counts = self.count(chunks)
+        matrix = self.matrix[order]
+        a_j = counts @ matrix
+        cik = filename.split('_')[0] if '_' in filename else 'unknown'
+        results = {}
+        for k, name in enumerate(self.names):
+            keep = np.flatnonzero(matrix[:, k])
+            results[name] = [[filename, cik, self.words[i], tf_ij, int(a_j[k])]
+                             for i, tf_ij in zip(order[keep].tolist(), counts[keep].tolist())]
+        return results
+
+
+if __name__ == '__main__':
+    print('\n' + time.strftime('%c') + '\nLexicon_Registry.py\n')
+    registry = LexiconRegistry()
+    registry.register('negative', ['LOSS', 'DECLINE', 'ADVERSE'])
+    registry.register('positive', ['GAIN', 'IMPROVE'])
+    registry.register('custom', ['LOSS', 'GAIN', 'REVENUE'])
+    text = 'Revenue rose; a gain offset the loss. Loss, decline and adverse rulings; no improvement.'
+    for name, rows in registry.score(text, '123_10-K.txt').items():
+        print(name, rows)
+    print('\n' + time.strftime('%c') + '\nNormal termination.')
@@ -1,60 +1,222 @@
 #!/usr/bin/python3
 """Routine to load MasterDictionary class"""
 # BDM : 201510
+#
+# The CSV is only read by the compile step.  compile_masterdictionary() writes a binary
+#   artifact next to the CSV, keyed by the CSV's SHA-256 and the format version:
+#
+#     <stem>.v<DICT_VERSION>.<sha256[:16]>.npy    structured array, one row per word in CSV order:
+#                                                 word, seq_num, word_count, word_proportion,
+#                                                 average_proportion, std_dev, doc_count, syllables,
+#                                                 the raw category cells (CATEGORY_COLUMNS),
+#                                                 flags (bit i = CATEGORIES[i]), source
+#     <stem>.v<DICT_VERSION>.<sha256[:16]>.json   version, source CSV, hash, header, word count,
+#                                                 total documents
+#
+#   load_compiled() memory-maps the artifact (compiling it first if the CSV changed), so every
+#   entry point -- load_masterdictionary(), category_words(), the parse scripts -- shares one
+#   parse of the CSV and loads in milliseconds.  load_masterdictionary() wraps it in a
+#   MasterDictionaryTable (word ids and typed columns) whose MasterDictionary entries are
+#   __slots__ views rather than per-word objects.
 
-import time
 import csv
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from collections.abc import Mapping
+
+import numpy as np
+
+
+DICT_VERSION = 3
+# Category bits in the 'flags' column
+CATEGORIES = ['negative', 'positive', 'uncertainty', 'litigious', 'strong_modal', 'weak_modal',
+              'constraining', 'complexity']
+SENTIMENT_CATEGORIES = ['negative', 'positive', 'uncertainty', 'litigious', 'constraining',
+                        'strong_modal', 'weak_modal']
+STOPWORDS = [
+    'ME', 'MY', 'MYSELF', 'WE', 'OUR', 'OURS', 'OURSELVES', 'YOU', 'YOUR', 'YOURS',
+    'YOURSELF', 'YOURSELVES', 'HE', 'HIM', 'HIS', 'HIMSELF', 'SHE', 'HER', 'HERS', 'HERSELF',
+    'IT', 'ITS', 'ITSELF', 'THEY', 'THEM', 'THEIR', 'THEIRS', 'THEMSELVES', 'WHAT', 'WHICH',
+    'WHO', 'WHOM', 'THIS', 'THAT', 'THESE', 'THOSE', 'AM', 'IS', 'ARE', 'WAS', 'WERE', 'BE',
+    'BEEN', 'BEING', 'HAVE', 'HAS', 'HAD', 'HAVING', 'DO', 'DOES', 'DID', 'DOING', 'AN',
+    'THE', 'AND', 'BUT', 'IF', 'OR', 'BECAUSE', 'AS', 'UNTIL', 'WHILE', 'OF', 'AT', 'BY',
+    'FOR', 'WITH', 'ABOUT', 'BETWEEN', 'INTO', 'THROUGH', 'DURING', 'BEFORE',
+    'AFTER', 'ABOVE', 'BELOW', 'TO', 'FROM', 'UP', 'DOWN', 'IN', 'OUT', 'ON', 'OFF', 'OVER',
+    'UNDER', 'AGAIN', 'FURTHER', 'THEN', 'ONCE', 'HERE', 'THERE', 'WHEN', 'WHERE', 'WHY',
+    'HOW', 'ALL', 'ANY', 'BOTH', 'EACH', 'FEW', 'MORE', 'MOST', 'OTHER', 'SOME', 'SUCH',
+    'NO', 'NOR', 'NOT', 'ONLY', 'OWN', 'SAME', 'SO', 'THAN', 'TOO', 'VERY', 'CAN',
+    'JUST', 'SHOULD', 'NOW'
+]
+# Words pandas.read_csv reads as missing by default.  The parse2-family scripts loaded the CSV
+#   with pandas and dropped missing words, so they never counted these (category_words(pandas_na=True)).
+PANDAS_NA_WORDS = frozenset(['NA', 'NULL', 'N/A', '#N/A', '#N/A N/A', '#NA', '<NA>'])
+# Category cells kept as the integers the CSV holds (year added, 0 = not a member); the 2014
+#   layout's Superfluous, Interesting, Modal (1 strong, 2 moderate, 3 weak), Irregular Verb and
+#   Harvard_IV are 0 for a 2024 CSV, whose Modal is derived from Strong_Modal/Weak_Modal
+CATEGORY_COLUMNS = ['negative', 'positive', 'uncertainty', 'litigious', 'constraining', 'superfluous',
+                    'interesting', 'modal', 'irregular_verb', 'harvard_iv', 'complexity']
+# Numeric columns:  (artifact column, CSV header, dtype)
+_NUMERIC_COLUMNS = [('seq_num', 'seq_num', '<i4'), ('word_count', 'word_count', '<i8'),
+                    ('word_proportion', 'word_proportion', '<f8'),
+                    ('average_proportion', 'average_proportion', '<f8'), ('std_dev', 'std_dev', '<f8'),
+                    ('doc_count', 'doc_count', '<i8'), ('syllables', 'syllables', 'u1')]
+
+
+# 2014 header names that differ from the 2024 ones
+_ALIASES = {'sequence_number': 'seq_num'}
+
+
+def _normalize(name):
+    name = name.strip().lower().replace(' ', '_')
+    return _ALIASES.get(name, name)
+
+
+def _number(value):
+    # CSV cell to float; blanks count as 0
+    value = value.strip()
+    return float(value) if value else 0.0
+
+
+def file_hash(file_path):
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def artifact_path(file_path, sha=None, artifact_dir=None):
+    # Artifact path without extension for the CSV at file_path
+    sha = sha or file_hash(file_path)
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(artifact_dir or os.path.dirname(file_path) or '.',
+                        '{0}.v{1}.{2}'.format(stem, DICT_VERSION, sha[:16]))
 
-def load_masterdictionary(file_path, print_flag=False, f_log=None, get_other=False):
-    _master_dictionary = {}
-    _sentiment_categories = ['negative', 'positive', 'uncertainty', 'litigious', 'constraining',
-                             'strong_modal', 'weak_modal']
-    _stopwords = [  # Your existing stopwords list
-        'ME', 'MY', 'MYSELF', 'WE', 'OUR', 'OURS', 'OURSELVES', 'YOU', 'YOUR', 'YOURS',
-        'YOURSELF', 'YOURSELVES', 'HE', 'HIM', 'HIS', 'HIMSELF', 'SHE', 'HER', 'HERS', 'HERSELF',
-        'IT', 'ITS', 'ITSELF', 'THEY', 'THEM', 'THEIR', 'THEIRS', 'THEMSELVES', 'WHAT', 'WHICH',
-        'WHO', 'WHOM', 'THIS', 'THAT', 'THESE', 'THOSE', 'AM', 'IS', 'ARE', 'WAS', 'WERE', 'BE',
-        'BEEN', 'BEING', 'HAVE', 'HAS', 'HAD', 'HAVING', 'DO', 'DOES', 'DID', 'DOING', 'AN',
-        'THE', 'AND', 'BUT', 'IF', 'OR', 'BECAUSE', 'AS', 'UNTIL', 'WHILE', 'OF', 'AT', 'BY',
-        'FOR', 'WITH', 'ABOUT', 'BETWEEN', 'INTO', 'THROUGH', 'DURING', 'BEFORE',
-        'AFTER', 'ABOVE', 'BELOW', 'TO', 'FROM', 'UP', 'DOWN', 'IN', 'OUT', 'ON', 'OFF', 'OVER',
-        'UNDER', 'AGAIN', 'FURTHER', 'THEN', 'ONCE', 'HERE', 'THERE', 'WHEN', 'WHERE', 'WHY',
-        'HOW', 'ALL', 'ANY', 'BOTH', 'EACH', 'FEW', 'MORE', 'MOST', 'OTHER', 'SOME', 'SUCH',
-        'NO', 'NOR', 'NOT', 'ONLY', 'OWN', 'SAME', 'SO', 'THAN', 'TOO', 'VERY', 'CAN',
-        'JUST', 'SHOULD', 'NOW'
-    ]
-
-    import csv  # Use Python's CSV module for robust parsing
 
+def read_masterdictionary_csv(file_path, print_flag=False):
+    # Compiler input:  (structured array, header) from the CSV, columns located by header name.
+    #   Handles the 2024 layout (Word, Seq_num, Word Count, ..., Negative, ..., Complexity,
+    #   Syllables, Source) and the 2014 layout, whose Modal column (1 strong, 3 weak) stands in
+    #   for Strong_Modal/Weak_Modal.  Category cells hold the year a word was added, or minus the
+    #   year it was removed, so only a positive value is membership (the flags bit); the raw
+    #   cells are kept in CATEGORY_COLUMNS.
     with open(file_path, 'r', encoding='utf-8') as f:
         reader = csv.reader(f)
-        _md_header = next(reader)  # Skip header row
-        
+        _md_header = next(reader)
+        position = {_normalize(name): i for i, name in enumerate(_md_header)}
+        rows = []
         for cols in reader:
-            # Skip lines with incorrect column count (expected: 19 columns)
-            if len(cols) != 17:
+            if len(cols) != len(_md_header) or not cols[position['word']].strip():
                 if print_flag:
-                    print(f"Skipping malformed line: {cols}")
+                    print('Skipping malformed line: {0}'.format(cols))
                 continue
-
             try:
-                word = cols[0].strip().upper()
-                _master_dictionary[word] = MasterDictionary(cols, _stopwords)
-                _total_documents += _master_dictionary[word].doc_count
-
-                if len(_master_dictionary) % 5000 == 0 and print_flag:
-                    print(f"\r...Loading Master Dictionary {len(_master_dictionary)}", end='', flush=True)
-            except Exception as e:
+                cells = {name: int(_number(cols[position[name]])) if name in position else 0
+                         for name in CATEGORY_COLUMNS + ['strong_modal', 'weak_modal']}
+                if 'modal' in position:
+                    cells['strong_modal'], cells['weak_modal'] = cells['modal'] == 1, cells['modal'] == 3
+                else:
+                    cells['modal'] = 1 if cells['strong_modal'] else 3 if cells['weak_modal'] else 0
+                flags = 0
+                for bit, category in enumerate(CATEGORIES):
+                    flags |= (cells[category] > 0) << bit
+                rows.append((cols[position['word']].strip().upper(),) +
+                            tuple(_number(cols[position[csv_name]]) if csv_name in position else 0
+                                  for _, csv_name, _ in _NUMERIC_COLUMNS) +
+                            tuple(cells[name] for name in CATEGORY_COLUMNS) +
+                            (flags, cols[position['source']].strip() if 'source' in position else ''))
+            except ValueError as e:
                 if print_flag:
-                    print(f"\nError parsing line: {cols}\nError: {str(e)}")
+                    print('\nError parsing line: {0}\nError: {1}'.format(cols, e))
                 continue
 
+    # 'S' widths are UTF-8 byte lengths, so non-ASCII entries are not truncated
+    dtype = ([('word', 'S{0}'.format(max([len(row[0].encode('utf-8')) for row in rows] + [1])))] +
+             [(name, code) for name, _, code in _NUMERIC_COLUMNS] +
+             [(name, '<i4') for name in CATEGORY_COLUMNS] +
+             [('flags', '<u2'), ('source', 'S{0}'.format(max([len(row[-1].encode('utf-8')) for row in rows] + [1])))])
+    table = np.empty(len(rows), dtype=dtype)
+    table['word'] = [row[0].encode('utf-8') for row in rows]
+    for i, name in enumerate([name for name, _, _ in _NUMERIC_COLUMNS] + CATEGORY_COLUMNS):
+        table[name] = [row[i + 1] for row in rows]
+    table['flags'] = [row[-2] for row in rows]
+    table['source'] = [row[-1].encode('utf-8') for row in rows]
+    return table, _md_header
+
+
+def compile_masterdictionary(file_path, artifact_dir=None, print_flag=False):
+    # Compile the CSV into the binary artifact; returns the artifact path (without extension)
+    start = time.time()
+    sha = file_hash(file_path)
+    path = artifact_path(file_path, sha, artifact_dir)
+    table, _md_header = read_masterdictionary_csv(file_path, print_flag)
+    meta = {'version': DICT_VERSION, 'source': os.path.basename(file_path), 'sha256': sha,
+            'header': _md_header, 'words': len(table), 'categories': CATEGORIES,
+            'total_documents': int(table['doc_count'].sum()),
+            'created': time.strftime('%Y-%m-%d %H:%M:%S')}
+    # Write the array before its metadata; the .json appearing is what marks the artifact complete
+    for suffix, write in (('.npy', lambda f: np.save(f, table)),
+                          ('.json', lambda f: f.write(json.dumps(meta).encode('utf-8')))):
+        fd, tmp_name = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.part',
+                                        dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_name, path + suffix)
+    if print_flag:
+        print('Master Dictionary compiled:  {0:,} words -> {1}.npy | Time = {2:.2f} seconds'.
+              format(len(table), path, time.time() - start))
+    return path
+
+
+def load_compiled(file_path, artifact_dir=None, print_flag=False):
+    # (memory-mapped structured array, metadata) for the CSV at file_path, compiling if needed
+    path = artifact_path(file_path, artifact_dir=artifact_dir)
+    try:
+        with open(path + '.json', 'r') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        meta = None
+    if meta is None or meta.get('version') != DICT_VERSION:
+        path = compile_masterdictionary(file_path, artifact_dir, print_flag)
+        with open(path + '.json', 'r') as f:
+            meta = json.load(f)
+    return np.load(path + '.npy', mmap_mode='r'), meta
+
+
+def category_mask(categories):
+    # Bitmask selecting any of the named categories
+    mask = 0
+    for category in categories:
+        mask |= 1 << CATEGORIES.index(category.lower())
+    return mask
+
+
+def category_words(file_path, category=None, pandas_na=False):
+    # Set of dictionary words, optionally only those in category (e.g. 'negative')
+    # pandas_na=True leaves out PANDAS_NA_WORDS, matching a pandas.read_csv load of the CSV
+    table, _ = load_compiled(file_path)
+    words = table['word']
+    if category is not None:
+        words = words[(table['flags'] & category_mask([category])) != 0]
+    words = set(word.decode('utf-8') for word in words.tolist())
+    return words - PANDAS_NA_WORDS if pandas_na else words
+
+
+def load_masterdictionary(file_path, print_flag=False, f_log=None, get_other=False):
+    # MasterDictionaryTable over the compiled artifact; indexing it by word gives a MasterDictionary view
+    _master_dictionary = MasterDictionaryTable(*load_compiled(file_path, print_flag=print_flag))
+
     if print_flag:
-        print(f"\nMaster Dictionary loaded from: {file_path}")
-        print(f"Total words: {len(_master_dictionary):,}")
+        print('Master Dictionary loaded from: {0}'.format(file_path))
+        print('Total words: {0:,}'.format(len(_master_dictionary)))
 
     if get_other:
-        return _master_dictionary, _md_header, _sentiment_categories, _stopwords, _total_documents
+        return (_master_dictionary, _master_dictionary.meta['header'], list(SENTIMENT_CATEGORIES),
+                list(STOPWORDS), _master_dictionary.meta['total_documents'])
     else:
         return _master_dictionary
 
@@ -62,67 +224,168 @@ def load_masterdictionary(file_path, print_flag=False, f_log=None, get_other=Fal
 def create_sentimentdictionaries(_master_dictionary, _sentiment_categories):
 
     _sentiment_dictionary = {}
+    # Create dictionary of sentiment dictionaries with count set = 0, one bitmask test per category
     for category in _sentiment_categories:
-        _sentiment_dictionary[category] = {}
-    # Create dictionary of sentiment dictionaries with count set = 0
-    for word in _master_dictionary.keys():
-        for category in _sentiment_categories:
-            if _master_dictionary[word].sentiment[category]:
-                _sentiment_dictionary[category][word] = 0
+        ids = np.flatnonzero(_master_dictionary.flags & category_mask([category]))
+        _sentiment_dictionary[category] = dict.fromkeys([_master_dictionary.words[i] for i in ids], 0)
 
     return _sentiment_dictionary
 
 
+class MasterDictionaryTable(Mapping):
+    # Struct-of-arrays master dictionary:  word -> integer id (CSV order), and one typed column
+    #   per field indexed by id.  The columns are views of the memory-mapped artifact, so workers
+    #   share its pages; only the word index and the two hot columns are per-process.
+    def __init__(self, table, meta):
+        self.meta = meta
+        self.words = [word.decode('utf-8') for word in table['word'].tolist()]
+        self.ids = dict(zip(self.words, range(len(self.words))))
+        self.flags = np.ascontiguousarray(table['flags'])          # bit i = CATEGORIES[i]
+        self.syllables = np.ascontiguousarray(table['syllables'])
+        self.seq_num = table['seq_num']
+        self.word_count = table['word_count']
+        self.word_proportion = table['word_proportion']
+        self.average_proportion = table['average_proportion']
+        self.std_dev = table['std_dev']
+        self.doc_count = table['doc_count']
+        self.source = table['source']
+        self.categories = {name: table[name] for name in CATEGORY_COLUMNS}  # raw category cells
+
+    def __getitem__(self, word):
+        return MasterDictionary(self, self.ids[word])
+
+    def __contains__(self, word):
+        return word in self.ids
+
+    def __iter__(self):
+        return iter(self.words)
+
+    def __len__(self):
+        return len(self.words)
+
+
+def _category_property(name):
+    return property(lambda self: int(self._table.categories[name][self.id]))
+
+
+def _flag_property(bit):
+    return property(lambda self: bool(self._table.flags[self.id] >> bit & 1))
+
+
 class MasterDictionary:
-    def __init__(self, cols, _stopwords):
-        self.word = cols[0].upper()
-        self.sequence_number = int(cols[1])
-        self.word_count = int(cols[2])
-        self.word_proportion = float(cols[3])
-        self.average_proportion = float(cols[4])
-        self.std_dev_prop = float(cols[5])
-        self.doc_count = int(cols[6])
-        self.negative = int(cols[7])
-        self.positive = int(cols[8])
-        self.uncertainty = int(cols[9])
-        self.litigious = int(cols[10])
-        self.constraining = int(cols[11])
-        self.superfluous = int(cols[12])
-        self.interesting = int(cols[13])
-        self.modal_number = int(cols[14])
-        self.strong_modal = False
-        if int(cols[14]) == 1:
-            self.strong_modal = True
-        self.moderate_modal = False
-        if int(cols[14]) == 2:
-            self.moderate_modal = True
-        self.weak_modal = False
-        if int(cols[14]) == 3:
-            self.weak_modal = True
-        self.sentiment = {}
-        self.sentiment['negative'] = bool(self.negative)
-        self.sentiment['positive'] = bool(self.positive)
-        self.sentiment['uncertainty'] = bool(self.uncertainty)
-        self.sentiment['litigious'] = bool(self.litigious)
-        self.sentiment['constraining'] = bool(self.constraining)
-        self.sentiment['strong_modal'] = bool(self.strong_modal)
-        self.sentiment['weak_modal'] = bool(self.weak_modal)
-        self.irregular_verb = int(cols[15])
-        self.harvard_iv = int(cols[16])
-        self.syllables = int(cols[17])
-        self.source = cols[18]
-
-        if self.word in _stopwords:
-            self.stopword = True
-        else:
-            self.stopword = False
-        return
+    # View of one word's row in a MasterDictionaryTable, with the original attribute names and types:
+    #   category attributes (negative, ..., superfluous, interesting, irregular_verb, harvard_iv,
+    #   modal_number, and complexity from the 2024 layout) are the CSV's integers; strong_modal,
+    #   moderate_modal and weak_modal are bools; sentiment maps SENTIMENT_CATEGORIES to bools
+    __slots__ = ('_table', 'id')
+
+    def __init__(self, _table, _id):
+        self._table = _table
+        self.id = _id
+
+    @property
+    def word(self):
+        return self._table.words[self.id]
+
+    @property
+    def sequence_number(self):
+        return int(self._table.seq_num[self.id])
+
+    @property
+    def word_count(self):
+        return int(self._table.word_count[self.id])
+
+    @property
+    def word_proportion(self):
+        return float(self._table.word_proportion[self.id])
+
+    @property
+    def average_proportion(self):
+        return float(self._table.average_proportion[self.id])
+
+    @property
+    def std_dev_prop(self):
+        return float(self._table.std_dev[self.id])
+
+    @property
+    def doc_count(self):
+        return int(self._table.doc_count[self.id])
+
+    @property
+    def syllables(self):
+        return int(self._table.syllables[self.id])
+
+    @property
+    def source(self):
+        return self._table.source[self.id].decode('utf-8')
+
+    @property
+    def modal_number(self):
+        return int(self._table.categories['modal'][self.id])
+
+    @property
+    def moderate_modal(self):
+        return self.modal_number == 2
+
+    @property
+    def sentiment(self):
+        flags = int(self._table.flags[self.id])
+        return {category: bool(flags >> bit & 1) for category, bit in _SENTIMENT_BITS}
+
+    @property
+    def stopword(self):
+        return self.word in _STOPWORD_SET
+
+    def __repr__(self):
+        return 'MasterDictionary({0!r})'.format(self.word)
+
+
+for _name in CATEGORY_COLUMNS:
+    if _name != 'modal':
+        setattr(MasterDictionary, _name, _category_property(_name))
+for _category in ('strong_modal', 'weak_modal'):
+    setattr(MasterDictionary, _category, _flag_property(CATEGORIES.index(_category)))
+_SENTIMENT_BITS = [(category, CATEGORIES.index(category)) for category in SENTIMENT_CATEGORIES]
+_STOPWORD_SET = frozenset(STOPWORDS)
+
+
+def check_compiler():
+    # Self-check on a small 2024-layout CSV:  a word removed from a category (negative year) is
+    #   not in it, and non-ASCII words and sources survive the byte-width 'S' columns
+    header = ['Word', 'Seq_num', 'Word Count', 'Word Proportion', 'Average Proportion', 'Std Dev', 'Doc Count',
+              'Negative', 'Positive', 'Uncertainty', 'Litigious', 'Strong_Modal', 'Weak_Modal', 'Constraining',
+              'Complexity', 'Syllables', 'Source']
+    rows = [['LOSS', 1, 10, 0, 0, 0, 5, 2009, 0, 0, 0, 0, 0, 0, 0, 1, '12of12inf'],
+            ['REMOVED', 2, 10, 0, 0, 0, 5, -2020, 0, 0, 0, 0, -2020, 0, 0, 2, '12of12inf'],
+            ['NAÏVETÉ', 3, 10, 0, 0, 0, 5, 0, 2011, 0, 0, 0, 0, 0, 0, 3, 'Ünïcode']]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'check.csv')
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerows([header] + rows)
+        md = load_masterdictionary(path)
+        failures = []
+        if category_words(path, 'negative') != {'LOSS'}:
+            failures.append('negative words: {0}'.format(sorted(category_words(path, 'negative'))))
+        if md['REMOVED'].sentiment['negative'] or md['REMOVED'].weak_modal or md['REMOVED'].negative != -2020:
+            failures.append('removed word: {0}'.format(md['REMOVED'].sentiment))
+        if 'NAÏVETÉ' not in md or md['NAÏVETÉ'].source != 'Ünïcode' or category_words(path, 'positive') != {'NAÏVETÉ'}:
+            failures.append('non-ASCII entry: {0}'.format(list(md)))
+    for failure in failures:
+        print('check_compiler failed:  ' + failure)
+    return len(failures)
+
 
 if __name__ == '__main__':
     # Full test program in /TextualAnalysis/TestPrograms/Test_Load_MasterDictionary.py
-    print(time.strftime('%c') + '/n')
-    #md = (r'D:\GD\Research\Natural_Language_Processing\Dictionaries\Master\\' +
-          #r'LoughranMcDonald_MasterDictionary_2014.csv')
-    master_dictionary, md_header, sentiment_categories, stopwords = load_masterdictionary(md, True, False, True)
+    print(time.strftime('%c') + '\n')
+    if check_compiler():
+        sys.exit('Master dictionary compiler self-check failed (see above).')
+    md = os.path.expanduser('~/Desktop/asg1/LoughranMcDonald_MasterDictionary_2024.csv')
+    compile_masterdictionary(md, print_flag=True)
+    start = time.time()
+    table, meta = load_compiled(md)
+    print('Compiled dictionary loaded in {0:.4f} seconds ({1:,} words).'.format(time.time() - start, len(table)))
+    master_dictionary, md_header, sentiment_categories, stopwords, total_documents = \
+        load_masterdictionary(md, True, False, True)
     print('\n' + 'Normal termination.')
-    print(time.strftime('%c') + '/n')
+    print(time.strftime('%c') + '\n')
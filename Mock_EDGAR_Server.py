@@ -0,0 +1,283 @@
+"""
+Local stand-in for the EDGAR archive, for benchmarking and regression-testing the
+download path without touching sec.gov.
+
+Serves, under <base_url>/Archives/:
+    edgar/full-index/<year>/QTR<n>/master.zip    synthetic quarterly master index
+    edgar/data/<cik>/<accession>.txt             synthetic full-submission filing
+    edgar/data/<cik>/<acc>/<accession>-index.htm per-filing index page ("Document Format Files")
+    edgar/data/<cik>/<acc>/index.json            directory listing
+    edgar/data/<cik>/<acc>/<document>            the individual documents of the filing
+Contents are generated deterministically from the path, so repeated runs see the same
+  corpus.  Faults are injected per request according to MockConfig:  fixed + random
+  latency, 429/503 responses with Retry-After, connections dropped mid-body, and a
+  per-connection bandwidth cap.  master.zip carries an ETag and honours If-None-Match.
+
+Usage:
+    server = MockEDGARServer(MockConfig(latency=0.05, p_throttle=0.02)).start()
+    EDGAR_Pac.PARM_ROOT_PATH = server.base_url + 'Archives/edgar/full-index/'
+    ...
+    print(server.stats())
+    server.stop()
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import random
+import re
+import threading
+import time
+import zipfile
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockConfig:
+
+    def __init__(self, latency=0.0, jitter=0.0, p_throttle=0.0, p_unavailable=0.0, retry_after=1.0,
+                 p_drop=0.0, bandwidth=0.0, filings_per_quarter=2000, filing_size=200_000,
+                 forms=('10-K', '10-Q', '8-K', '4', 'SC 13G'), seed=0):
+        self.latency = latency                          # Seconds added to every response
+        self.jitter = jitter                            # Extra uniform random latency, 0..jitter seconds
+        self.p_throttle = p_throttle                    # Probability of a 429 response
+        self.p_unavailable = p_unavailable              # Probability of a 503 response
+        self.retry_after = retry_after                  # Retry-After (seconds) sent with 429/503
+        self.p_drop = p_drop                            # Probability of closing the connection mid-body
+        self.bandwidth = bandwidth                      # Bytes/second per connection (0 = unlimited)
+        self.filings_per_quarter = filings_per_quarter  # Rows in each synthetic master.idx
+        self.filing_size = filing_size                  # Approximate bytes per synthetic submission
+        self.forms = forms
+        self.seed = seed
+
+
+_INDEX_PATH = re.compile(r'^/Archives/edgar/full-index/(\d{4})/QTR([1-4])/master\.zip$')
+_FILING_PATH = re.compile(r'^/Archives/edgar/data/(\d+)/([\w-]+)\.txt$')
+_FOLDER_PATH = re.compile(r'^/Archives/edgar/data/(\d+)/(\d{18})/([\w.-]+)$')
+
+_WORDS = ('THE COMPANY REPORTED NET INCOME LOSS LITIGATION UNCERTAIN MAY COULD MUST '
+          'ADVERSE IMPAIRMENT REVENUE GROWTH STRONG RISK FACTORS DECLINE IMPROVED').split()
+
+
+def synthetic_masterindex(year, qtr, config):
+    # master.idx bytes for one quarter
+    rng = random.Random('{0}-{1}-{2}'.format(config.seed, year, qtr))
+    lines = ['Description:           Master Index of EDGAR Dissemination Feed',
+             'Last Data Received:    {0}-QTR{1}'.format(year, qtr),
+             'Comments:              webmaster@sec.gov',
+             'Anonymous FTP:         ftp://ftp.sec.gov/edgar/',
+             'Cloud HTTP:            https://www.sec.gov/Archives/',
+             '', '', '',
+             'CIK|Company Name|Form Type|Date Filed|Filename',
+             '-' * 80]
+    month = 3 * qtr - 2
+    for i in range(config.filings_per_quarter):
+        cik = rng.randint(1000, 1999999)
+        accession = '{0:010d}-{1:02d}-{2:06d}'.format(cik, year % 100, i)
+        lines.append('{0}|MOCK COMPANY {0}|{1}|{2}-{3:02d}-{4:02d}|edgar/data/{0}/{5}.txt'.format(
+            cik, rng.choice(config.forms), year, month + rng.randint(0, 2), rng.randint(1, 28), accession))
+    return ('\n'.join(lines) + '\n').encode('latin-1')
+
+
+def synthetic_documents(cik, accession, config):
+    # [(sequence, type, file name, text)]:  primary document, exhibits and a graphic
+    rng = random.Random('{0}-{1}-{2}'.format(config.seed, cik, accession))
+    n_words = max(1, config.filing_size // 8)
+    body = ' '.join(rng.choice(_WORDS) for _ in range(n_words))
+    body = '\n'.join(body[i:i + 80] for i in range(0, len(body), 80))
+    exhibit = ' '.join(rng.choice(_WORDS) for _ in range(n_words // 4))
+    graphic = 'begin 644 logo.jpg\n' + 'M' * 60 + '\nend'
+    return [(1, '10-K', 'primary.htm', '<html><body><p>{0}</p></body></html>'.format(body)),
+            (2, 'EX-21.1', 'ex21.htm', '<html><body>SUBSIDIARIES</body></html>'),
+            (3, 'EX-13', 'ex13.htm', '<html><body>{0}</body></html>'.format(exhibit)),
+            (4, 'GRAPHIC', 'logo.jpg', graphic)]
+
+
+def synthetic_filing(cik, accession, config):
+    # Full-submission .txt bytes:  SGML header followed by every document
+    parts = ['<SEC-DOCUMENT>{1}.txt\n<SEC-HEADER>{1}.hdr.sgml\nACCESSION NUMBER:\t\t{1}\n'
+             'CONFORMED SUBMISSION TYPE:\t10-K\nCENTRAL INDEX KEY:\t\t{0:010d}\n</SEC-HEADER>\n'.
+             format(int(cik), accession)]
+    for seq, doc_type, fname, text in synthetic_documents(cik, accession, config):
+        parts.append('<DOCUMENT>\n<TYPE>{0}\n<SEQUENCE>{1}\n<FILENAME>{2}\n<TEXT>\n{3}\n</TEXT>\n</DOCUMENT>\n'.
+                     format(doc_type, seq, fname, text))
+    parts.append('</SEC-DOCUMENT>\n')
+    return ''.join(parts).encode('utf-8')
+
+
+def synthetic_index_page(cik, accession, config):
+    # -index.htm with the same "Document Format Files" table layout as EDGAR
+    folder = '/Archives/edgar/data/{0}/{1}/'.format(int(cik), accession.replace('-', ''))
+    rows = ['<tr><th scope="col">Seq</th><th scope="col">Description</th><th scope="col">Document</th>'
+            '<th scope="col">Type</th><th scope="col">Size</th></tr>']
+    for seq, doc_type, fname, text in synthetic_documents(cik, accession, config):
+        link = ('/ix?doc=' if seq == 1 else '') + folder + fname
+        rows.append('<tr><td scope="row">{0}</td><td scope="row">{1}</td><td scope="row"><a href="{2}">{3}</a>'
+                    '</td><td scope="row">{1}</td><td scope="row">{4}</td></tr>'.
+                    format(seq, doc_type, link, fname, len(text)))
+    rows.append('<tr><td scope="row">&nbsp;</td><td scope="row">Complete submission text file</td>'
+                '<td scope="row"><a href="/Archives/edgar/data/{0}/{1}.txt">{1}.txt</a></td>'
+                '<td scope="row">&nbsp;</td><td scope="row">0</td></tr>'.format(int(cik), accession))
+    return ('<html><body><div id="formName"><strong>Form 10-K</strong></div>\n'
+            '<table class="tableFile" summary="Document Format Files">\n{0}\n</table>\n</body></html>'.
+            format('\n'.join(rows))).encode('utf-8')
+
+
+def synthetic_index_json(cik, accession, config):
+    items = [{'name': fname, 'type': 'text.gif', 'size': len(text)}
+             for seq, doc_type, fname, text in synthetic_documents(cik, accession, config)]
+    return json.dumps({'directory': {'item': items, 'name': '/Archives/edgar/data/{0}/{1}'.format(
+        int(cik), accession.replace('-', ''))}}).encode('utf-8')
+
+
+def folder_file(cik, folder, name, config):
+    # Bytes of one file in an accession folder, or None
+    accession = '{0}-{1}-{2}'.format(folder[:10], folder[10:12], folder[12:])
+    if name == accession + '-index.htm':
+        return synthetic_index_page(cik, accession, config), 'text/html'
+    if name == 'index.json':
+        return synthetic_index_json(cik, accession, config), 'application/json'
+    for seq, doc_type, fname, text in synthetic_documents(cik, accession, config):
+        if name == fname:
+            return text.encode('utf-8'), 'text/html'
+    return None, None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # keep-alive, like www.sec.gov
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server.mock
+        config = server.config
+        rng = server.rng()
+        start = time.monotonic()
+        delay = config.latency + (rng.uniform(0, config.jitter) if config.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+
+        roll = rng.random()
+        if roll < config.p_throttle:
+            return self._error(429, 'Too Many Requests', start)
+        if roll < config.p_throttle + config.p_unavailable:
+            return self._error(503, 'Service Unavailable', start)
+
+        index_match = _INDEX_PATH.match(self.path)
+        filing_match = _FILING_PATH.match(self.path)
+        folder_match = _FOLDER_PATH.match(self.path)
+        body = None
+        if folder_match:
+            body, content_type = folder_file(*folder_match.groups(), config)
+        if index_match:
+            body = server.master_zip(int(index_match.group(1)), int(index_match.group(2)))
+            etag = '"{0}"'.format(hashlib.md5(body).hexdigest())
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return server.record(304, 0, start)
+            headers = {'Content-Type': 'application/zip', 'ETag': etag}
+        elif filing_match or body is not None:
+            if filing_match:
+                body, content_type = synthetic_filing(filing_match.group(1), filing_match.group(2), config), 'text/plain'
+            headers = {'Content-Type': content_type}
+            if 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+                body = gzip.compress(body, compresslevel=1)
+                headers['Content-Encoding'] = 'gzip'
+        else:
+            return self._error(404, 'Not Found', start)
+
+        self.send_response(200)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+
+        # Send the body in slices so bandwidth caps and mid-body drops can be applied
+        drop_at = int(len(body) * rng.uniform(0.1, 0.9)) if rng.random() < config.p_drop else None
+        step = 1 << 16
+        for offset in range(0, len(body), step):
+            if drop_at is not None and offset + step > drop_at:
+                self.wfile.write(body[offset:drop_at])
+                self.wfile.flush()
+                self.close_connection = True
+                return server.record('drop', drop_at, start)
+            self.wfile.write(body[offset:offset + step])
+            if config.bandwidth:
+                time.sleep(min(step, len(body) - offset) / config.bandwidth)
+        server.record(200, len(body), start)
+
+    def _error(self, status, reason, start):
+        body = reason.encode()
+        self.send_response(status)
+        if status in (429, 503):
+            self.send_header('Retry-After', str(self.server.mock.config.retry_after))
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.mock.record(status, len(body), start)
+
+
+class MockEDGARServer:
+
+    def __init__(self, config=None, host='127.0.0.1', port=0):
+        self.config = config if config else MockConfig()
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock = self
+        self.base_url = 'http://{0}:{1}/'.format(*self.httpd.server_address[:2])
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.bytes_sent = 0
+        self.latencies = []
+        self._zips = {}
+        self._n_rng = 0
+        self.thread = None
+
+    def rng(self):
+        with self.lock:
+            self._n_rng += 1
+            return random.Random('{0}-req-{1}'.format(self.config.seed, self._n_rng))
+
+    def master_zip(self, year, qtr):
+        with self.lock:
+            if (year, qtr) not in self._zips:
+                buf = io.BytesIO()
+                with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as zf:
+                    zf.writestr('master.idx', synthetic_masterindex(year, qtr, self.config))
+                self._zips[(year, qtr)] = buf.getvalue()
+            return self._zips[(year, qtr)]
+
+    def record(self, status, n_bytes, start):
+        with self.lock:
+            self.counts[status] += 1
+            self.bytes_sent += n_bytes
+            self.latencies.append(time.monotonic() - start)
+
+    def stats(self):
+        with self.lock:
+            return {'requests': sum(self.counts.values()), 'by_status': dict(self.counts),
+                    'bytes_sent': self.bytes_sent}
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == '__main__':
+    server = MockEDGARServer(port=8000)
+    print('Mock EDGAR server on {0}  (Ctrl-C to stop)'.format(server.base_url))
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(server.stats())
@@ -0,0 +1,179 @@
+#!/usr/bin/python3
+"""
+    Point-in-time S&P 500 membership
+    Composition history is held as dated snapshots:  one row per (date, constituent),
+      sorted by date, with the rows of each snapshot contiguous.  "Constituents as of D"
+      is the latest snapshot dated on or before D (a binary search on the snapshot
+      dates), which is what the notebook's find_close_date/update_indices computed by
+      scanning the whole spreadsheet.
+    is_member() answers many (ticker or CIK, date) pairs at once, and members() gives
+      every constituent in effect at any time during a period (e.g. a quarter), which
+      is the filter download_forms applies to the master index.
+
+    Sources:
+      load_composition('sp500_composition.xlsx')  columns Date, Ticker, Company Name;
+          parsed once and cached next to the workbook as <name>.npz
+      load_cik_snapshots('sp500_ciks_*.csv')       cik.py output (Symbol, CIK), one file
+          per year, each a snapshot dated December 31 of that year; files with a Date
+          column (cik.py --freq month/day) hold their own snapshot dates
+"""
+
+import glob
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+
+PARM_COMPOSITION = 'sp500_composition.xlsx'
+PARM_CIK_SNAPSHOTS = 'sp500_ciks_*.csv'
+
+
+class SP500Membership:
+
+    def __init__(self, dates, tickers, ciks=None, names=None):
+        # dates:  snapshot date of each row; tickers/ciks/names:  the constituent (ciks -1 if unknown)
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        tickers = np.array([str(t).strip().upper() for t in tickers], dtype=object)
+        ciks = np.full(len(dates), -1, dtype=np.int64) if ciks is None else np.asarray(ciks, dtype=np.int64)
+        names = np.full(len(dates), '', dtype=object) if names is None else np.asarray(names, dtype=object)
+        order = np.lexsort((tickers, dates))
+        self.dates, self.tickers, self.ciks, self.names = dates[order], tickers[order], ciks[order], names[order]
+        self.snapshot_dates, self.offsets = np.unique(self.dates, return_index=True)
+        self.offsets = np.append(self.offsets, len(self.dates))
+        # (snapshot, key) pairs encoded as one sorted int64 per row, for vectorized as-of joins
+        snapshot = np.repeat(np.arange(len(self.snapshot_dates)), np.diff(self.offsets))
+        self._index, self._keys = {}, {}
+        for by, values in (('ticker', self.tickers), ('cik', self.ciks)):
+            index = pd.Index(pd.unique(values))
+            self._index[by] = index
+            self._keys[by] = np.unique(snapshot * len(index) + index.get_indexer(values))
+
+    def __len__(self):
+        return len(self.snapshot_dates)
+
+    def snapshot_of(self, dates):
+        # Position of the snapshot in effect on each date (-1 before the first snapshot)
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        return np.searchsorted(self.snapshot_dates, dates, side='right') - 1
+
+    def constituents(self, date):
+        # DataFrame (date, ticker, cik, name) of the snapshot in effect on date
+        k = int(self.snapshot_of([pd.Timestamp(date).to_datetime64()])[0])
+        rows = slice(self.offsets[k], self.offsets[k + 1]) if k >= 0 else slice(0, 0)
+        return pd.DataFrame({'date': self.dates[rows], 'ticker': self.tickers[rows],
+                             'cik': self.ciks[rows], 'name': self.names[rows]})
+
+    def is_member(self, keys, dates, by='ticker'):
+        # Boolean array:  keys[i] (ticker or CIK) was a constituent on dates[i]
+        index = self._index[by]
+        if by == 'ticker':
+            keys = [str(k).strip().upper() if k is not None else '' for k in keys]
+        key_ids = index.get_indexer(pd.Index(keys))
+        k = self.snapshot_of(dates)
+        codes = k * len(index) + key_ids
+        pos = np.searchsorted(self._keys[by], codes).clip(0, max(len(self._keys[by]) - 1, 0))
+        return (key_ids >= 0) & (k >= 0) & (self._keys[by][pos] == codes)
+
+    def covers(self, date):
+        # True if a snapshot is in effect on date
+        return len(self.snapshot_dates) > 0 and self.snapshot_dates[0] <= pd.Timestamp(date).to_datetime64()
+
+    def missing_snapshot_message(self, bgn, end=None):
+        # Warning for a period that ends before the first snapshot, or None if it is covered
+        end = end if end is not None else bgn
+        if self.covers(end):
+            return None
+        first = pd.Timestamp(self.snapshot_dates[0]).date() if len(self.snapshot_dates) else None
+        return ('No S&P 500 snapshot on or before {0}; using the earliest ({1}).  Run cik.py for {2} to write '
+                'sp500_ciks_{2}.csv.'.format(pd.Timestamp(end).date(), first, pd.Timestamp(bgn).year - 1))
+
+    def members(self, bgn, end=None, by='cik', strict=False):
+        # Set of tickers or CIKs that were constituents at any time in [bgn, end]
+        # A period ending before the first snapshot falls back to that snapshot with a printed
+        #   warning (an empty set would filter out every filing); strict=True raises ValueError
+        bgn = pd.Timestamp(bgn).to_datetime64()
+        end = pd.Timestamp(end if end is not None else bgn).to_datetime64()
+        k_bgn, k_end = self.snapshot_of([bgn, end])
+        if k_end < 0:
+            message = self.missing_snapshot_message(bgn, end)
+            if strict or not len(self.snapshot_dates):
+                raise ValueError(message)
+            print('Warning:  ' + message)
+            k_end = 0
+        rows = slice(self.offsets[max(k_bgn, 0)], self.offsets[k_end + 1])
+        values = self.tickers[rows] if by == 'ticker' else self.ciks[rows]
+        return set(v for v in values.tolist() if v != -1)
+
+    def save(self, path, signature=None):
+        np.savez(path, dates=self.dates, tickers=self.tickers.astype(str), ciks=self.ciks,
+                 names=self.names.astype(str), signature=np.array(signature or []))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            return cls(arrays['dates'], arrays['tickers'], arrays['ciks'], arrays['names'])
+
+
+def quarter_bounds(year, qtr):
+    # (first day, last day) of a calendar quarter
+    bgn = pd.Timestamp(year, 3 * qtr - 2, 1)
+    return bgn, bgn + pd.offsets.QuarterEnd(0)
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def load_composition(path=PARM_COMPOSITION, resolver=None):
+    # Composition workbook (Date, Ticker, Company Name), cached as <path stem>.npz until the workbook changes
+    # resolver:  optional EDGAR_Tickers.TickerResolver to fill in CIKs from tickers
+    cache_path = os.path.splitext(path)[0] + '.npz'
+    if os.path.exists(cache_path):
+        with np.load(cache_path) as arrays:
+            is_current = arrays['signature'].tolist() == _signature(path)
+        if is_current:
+            membership = SP500Membership.load(cache_path)
+            if resolver is None or (membership.ciks >= 0).any():
+                return membership
+    df = pd.read_excel(path)
+    df = df[df['Ticker'].notnull()]
+    ciks = resolver.ciks(df['Ticker']) if resolver is not None else None
+    membership = SP500Membership(df['Date'].values, df['Ticker'].values, ciks, df['Company Name'].astype(str).str.strip())
+    membership.save(cache_path, _signature(path))
+    return membership
+
+
+def load_cik_snapshots(pattern=PARM_CIK_SNAPSHOTS):
+    # cik.py output files sp500_ciks_<year>.csv, each a snapshot as of December 31 of <year>,
+    #   and/or sp500_ciks_history.csv, whose Date column dates each snapshot
+    frames = []
+    for path in sorted(glob.glob(pattern)):
+        df = pd.read_csv(path, dtype={'CIK': str})
+        if 'Date' in df.columns:
+            df['Date'] = pd.to_datetime(df['Date'])
+        else:
+            match = re.search(r'(\d{4})\D*$', os.path.basename(path))
+            if not match:
+                continue
+            df['Date'] = pd.Timestamp(int(match.group(1)), 12, 31)
+        frames.append(df[df['CIK'].notnull()])
+    if not frames:
+        raise FileNotFoundError('No S&P 500 CIK snapshots match {0}'.format(pattern))
+    df = pd.concat(frames, ignore_index=True)
+    return SP500Membership(df['Date'].values, df['Symbol'].values, df['CIK'].astype(np.int64).values)
+
+
+# Test routine
+if __name__ == '__main__':
+    print('\n' + time.strftime('%c') + '\nND_SRAF:  Program SP500_Membership.py\n')
+    membership = SP500Membership(pd.to_datetime(['2023-12-29', '2023-12-29', '2024-03-28', '2024-03-28']),
+                                 ['AAPL', 'XYZ', 'AAPL', 'NEW'], [320193, 1, 320193, 2])
+    print(membership.constituents('2024-01-01'))
+    print(membership.is_member(['AAPL', 'XYZ', 'XYZ', 'NEW', 'NEW'],
+                               pd.to_datetime(['2024-01-05', '2024-01-05', '2024-04-01', '2024-04-01', '2023-01-01'])))
+    print(sorted(membership.members(*quarter_bounds(2024, 1))))
+    print(time.strftime('%c'))
@@ -0,0 +1,118 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import cpu_count
+import EDGAR_Pac
+import EDGAR_Tickers
+import SP500_Membership
+
+# Builds sp500_files.csv (company_name, published_time, type, link_url): every 10-K/10-Q
+#   filed by a company that was in the S&P 500 at the start of the quarter.
+#   Each quarter's master index is parsed columnar with form pushdown, joined against
+#   point-in-time membership in one vectorized call, and quarters run in parallel.
+#   The parent fetches/revalidates the indices once; workers parse the cached files.
+#   Output ending in .parquet is written in that columnar format instead of CSV.
+
+# === CONFIGURATION ===
+BGN_YEAR = 2022
+END_YEAR = pd.Timestamp('today').year
+FORMS = ['10-K', '10-K/A', '10-Q', '10-Q/A']
+COMPOSITION_FILE = 'sp500_composition.xlsx'   # Date, Ticker, Company Name; joined on ticker
+CIK_SNAPSHOTS = None                          # e.g. 'sp500_ciks_*.csv' to join on CIK instead
+EDGAR_PREFIX = 'https://www.sec.gov/Archives/'
+OUTPUT_FILE = 'sp500_files.csv'
+N_WORKERS = min(cpu_count(), 8)
+COLUMNS = ['company_name', 'published_time', 'type', 'link_url']
+
+# === Worker State (sent once per process) ===
+_membership = None
+_resolver = None
+
+def init_worker(membership, resolver):
+    global _membership, _resolver
+    _membership, _resolver = membership, resolver
+
+# === One Quarter ===
+def quarter_files(year, qtr, forms=FORMS, membership=None, resolver=None, index_file=None):
+    # DataFrame of COLUMNS for one quarter; joins on ticker when a resolver is given, else on CIK
+    # index_file:  the quarter's already cached master.idx (read without contacting SEC);
+    #   None loads it through EDGAR_Pac's cache
+    membership = membership if membership is not None else _membership
+    resolver = resolver if resolver is not None else _resolver
+    if index_file is not None:
+        with open(index_file, 'rb') as f:
+            masterindex = EDGAR_Pac.parse_masterindex(f.read(), forms)
+    else:
+        masterindex = EDGAR_Pac.load_masterindex(year, qtr, forms=forms)
+    if not masterindex:
+        return pd.DataFrame(columns=COLUMNS)
+    quarter_start = np.full(len(masterindex), SP500_Membership.quarter_bounds(year, qtr)[0].to_datetime64())
+    if resolver is not None:
+        keep = membership.is_member(resolver.tickers(masterindex.cik), quarter_start, by='ticker')
+    else:
+        keep = membership.is_member(masterindex.cik, quarter_start, by='cik')
+    matches = masterindex.take(keep)
+    return pd.DataFrame({'company_name': matches.name, 'published_time': f"{year}Q{qtr}",
+                         'type': matches.form, 'link_url': EDGAR_PREFIX + pd.Series(matches.path, dtype=object)},
+                        columns=COLUMNS)
+
+def _quarter_files(args):
+    year, qtr, forms, index_file = args
+    return quarter_files(year, qtr, forms, index_file=index_file)
+
+# === All Quarters ===
+def quarters_until_today(bgn_year, end_year):
+    # (year, qtr) pairs that have started by today
+    today = pd.Timestamp('today')
+    return [(year, qtr) for year in range(bgn_year, end_year + 1) for qtr in range(1, 5)
+            if SP500_Membership.quarter_bounds(year, qtr)[0] <= today]
+
+def build_sp500_files(bgn_year=BGN_YEAR, end_year=END_YEAR, forms=FORMS, membership=None, resolver=None,
+                      n_workers=N_WORKERS):
+    # Rows for every quarter, in quarter order
+    quarters = quarters_until_today(bgn_year, end_year)
+    # Fetch/revalidate every index once here; workers only read the cached files
+    index_files = {yq: EDGAR_Pac.masterindex_cache_file(*yq)
+                   for yq, data in EDGAR_Pac.cache_masterindices(bgn_year, end_year).items() if data is not None}
+    tasks = [(year, qtr, forms, index_files[year, qtr]) for year, qtr in quarters if (year, qtr) in index_files]
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=init_worker,
+                                 initargs=(membership, resolver)) as executor:
+            frames = list(executor.map(_quarter_files, tasks))
+    else:
+        frames = [quarter_files(year, qtr, forms, membership, resolver, index_file)
+                  for year, qtr, forms, index_file in tasks]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=COLUMNS)
+
+def write_output(df, path):
+    if path.endswith('.parquet'):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+# === Main Function ===
+def main():
+    parser = argparse.ArgumentParser(description='Build sp500_files.csv from the EDGAR master indices.')
+    parser.add_argument('--bgn-year', type=int, default=BGN_YEAR)
+    parser.add_argument('--end-year', type=int, default=END_YEAR)
+    parser.add_argument('--forms', nargs='+', default=FORMS)
+    parser.add_argument('--composition', default=COMPOSITION_FILE, help='composition workbook (ticker join)')
+    parser.add_argument('--cik-snapshots', default=CIK_SNAPSHOTS, help='cik.py CSV pattern (CIK join)')
+    parser.add_argument('--output', default=OUTPUT_FILE, help='.csv or .parquet')
+    parser.add_argument('--workers', type=int, default=N_WORKERS)
+    args = parser.parse_args()
+
+    start_time = time.time()
+    if args.cik_snapshots:
+        membership, resolver = SP500_Membership.load_cik_snapshots(args.cik_snapshots), None
+    else:
+        membership = SP500_Membership.load_composition(args.composition)
+        resolver = EDGAR_Tickers.TickerResolver()
+    df = build_sp500_files(args.bgn_year, args.end_year, args.forms, membership, resolver, args.workers)
+    write_output(df, args.output)
+    print(f"{len(df)} filings written to {args.output} in {time.time() - start_time:.2f} seconds.")
+
+if __name__ == '__main__':
+    main()
@@ -1,61 +1,160 @@
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
+import argparse
+import gzip
+import html
+import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
 
-def extract_sp500_ciks(year):
-    # Fetch archived Wikipedia page
-    url = f"https://web.archive.org/web/{year}1231/https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, "html.parser")
+import EDGAR_Downloader
 
-    # Find the constituents table
-    table = soup.find("table", {"id": "constituents"})
-    if not table:
-        print(f"No constituents table found for {year}.")
+# Wikipedia's S&P 500 constituents table, as archived by the Wayback Machine.
+#   Raw snapshots are cached under CACHE_DIR (gzipped), so reruns and offline
+#   replays never touch the network; missing snapshots are fetched concurrently
+#   under a shared request-rate limit.
+
+# === CONFIGURATION ===
+WIKI_URL = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
+# id_ asks the Wayback Machine for the archived page as-is, without its toolbar markup
+WAYBACK_URL = "https://web.archive.org/web/{stamp}id_/" + WIKI_URL
+CACHE_DIR = "wayback_cache"
+N_WORKERS = 4
+MAX_RATE = 1                 # Requests/second to web.archive.org, all workers combined
+HISTORY_FILE = "sp500_ciks_history.csv"
+USER_AGENT = "DRod/1.0 (dr1902@nyu.edu; For educational purposes)"
+
+_bucket = EDGAR_Downloader.TokenBucket(MAX_RATE)
+_local = threading.local()
+
+_TABLE = re.compile(r'<table[^>]*\bid="constituents"[^>]*>(.*?)</table>', re.S | re.I)
+_ROW = re.compile(r'<tr[^>]*>(.*?)</tr>', re.S | re.I)
+_HEADER = re.compile(r'<th[^>]*>(.*?)</th>', re.S | re.I)
+_CELL = re.compile(r'<td[^>]*>(.*?)</td>', re.S | re.I)
+_TAG = re.compile(r'<[^>]+>')
+_CIK_HREF = re.compile(r'cik=(\d+)', re.I)
+
+
+def cell_text(cell):
+    return html.unescape(_TAG.sub('', cell)).strip()
+
+
+# === Snapshot Cache ===
+def cache_path(stamp):
+    return os.path.join(CACHE_DIR, f"{stamp}.html.gz")
+
+
+def fetch_snapshot(stamp, offline=False):
+    # Archived page for a YYYYMMDD stamp, from the cache if present; None if unavailable
+    path = cache_path(stamp)
+    if os.path.exists(path):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return f.read()
+    if offline:
+        print(f"No cached snapshot for {stamp} (offline).")
         return None
 
-    # Extract headers to find CIK column index
-    headers = [th.get_text(strip=True).lower() for th in table.find_all("th")]
+    import requests  # only needed when fetching
+    if not hasattr(_local, 'session'):
+        _local.session = requests.Session()
+        _local.session.headers['User-Agent'] = USER_AGENT
+    _bucket.acquire()
     try:
-        cik_col_idx = headers.index("cik")
-    except ValueError:
-        print(f"No 'CIK' column found for {year}.")
+        response = _local.session.get(WAYBACK_URL.format(stamp=stamp), timeout=60)
+        response.raise_for_status()
+    except Exception as e:
+        print(f"Error fetching snapshot {stamp}: {e}")
+        return None
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with gzip.open(path + '.part', 'wt', encoding='utf-8') as f:
+        f.write(response.text)
+    os.replace(path + '.part', path)
+    return response.text
+
+
+# === Table Extraction ===
+def parse_constituents(page):
+    # DataFrame (Symbol, CIK) from the constituents table, or None if the page has none
+    table = _TABLE.search(page)
+    if not table:
         return None
+    rows = _ROW.findall(table.group(1))
+    headers = [cell_text(th).lower() for th in _HEADER.findall(rows[0])] if rows else []
+    if "cik" not in headers:
+        return None
+    cik_col_idx = headers.index("cik")
 
-    # Extract rows
-    rows = table.find_all("tr")
     data = []
     for row in rows[1:]:  # Skip header row
-        cols = row.find_all("td")
-        if not cols:
+        cols = _CELL.findall(row)
+        if len(cols) <= cik_col_idx:
             continue
 
         # Extract symbol
-        symbol = cols[0].get_text(strip=True).upper().replace(".", "-")
-        
-        # Extract CIK (from <a> tag if present)
-        cik_cell = cols[cik_col_idx]
-        cik = ""
-        a_tag = cik_cell.find("a")
-        if a_tag:
-            href = a_tag.get("href", "")
-            # Extract CIK from URL (e.g., /cgi-bin/browse-edgar?CIK=0000320193)
-            match = re.search(r"cik=(\d+)", href, re.IGNORECASE)
-            if match:
-                cik = match.group(1).zfill(10)
-        else:
-            cik = cik_cell.get_text(strip=True).zfill(10)
-
-        data.append({"Symbol": symbol, "CIK": cik})
-
-    # Save to DataFrame
-    df = pd.DataFrame(data)
+        symbol = cell_text(cols[0]).upper().replace(".", "-")
+
+        # Extract CIK (from link if present, e.g. /cgi-bin/browse-edgar?CIK=0000320193)
+        match = _CIK_HREF.search(cols[cik_col_idx])
+        cik = match.group(1) if match else cell_text(cols[cik_col_idx])
+        data.append({"Symbol": symbol, "CIK": cik.zfill(10)})
+    return pd.DataFrame(data, columns=["Symbol", "CIK"])
+
+
+# === Snapshot Dates ===
+def snapshot_stamps(bgn_year, end_year, freq='year'):
+    # YYYYMMDD stamps:  year-ends, month-ends or every day
+    dates = pd.date_range(f"{bgn_year}-01-01", f"{end_year}-12-31", freq={'year': 'YE', 'month': 'ME', 'day': 'D'}[freq])
+    return [d.strftime('%Y%m%d') for d in dates]
+
+
+def extract_snapshots(stamps, offline=False, n_workers=N_WORKERS):
+    # {stamp: DataFrame} for every stamp whose snapshot could be fetched and parsed
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        pages = executor.map(lambda stamp: fetch_snapshot(stamp, offline), stamps)
+        results = {}
+        for stamp, page in zip(stamps, pages):
+            df = parse_constituents(page) if page else None
+            if df is None:
+                print(f"No constituents table found for {stamp}.")
+                continue
+            results[stamp] = df
+    return results
+
+
+def extract_sp500_ciks(year, offline=False):
+    # Year-end snapshot saved as sp500_ciks_<year>.csv (the file SP500_Membership.load_cik_snapshots reads)
+    df = extract_snapshots([f"{year}1231"], offline).get(f"{year}1231")
+    if df is None:
+        return None
     df.to_csv(f"sp500_ciks_{year}.csv", index=False)
     print(f"Saved {len(df)} CIKs for {year}.")
     return df
 
-# Run for years 2018–2022
-years = [2020, 2021, 2022, 2023, 2024]
-for year in years:
-    extract_sp500_ciks(year)
\ No newline at end of file
+
+# === Main Function ===
+def main():
+    parser = argparse.ArgumentParser(description='S&P 500 CIKs from archived Wikipedia snapshots.')
+    parser.add_argument('--bgn-year', type=int, default=2020)
+    parser.add_argument('--end-year', type=int, default=2024)
+    parser.add_argument('--freq', choices=['year', 'month', 'day'], default='year')
+    parser.add_argument('--offline', action='store_true', help='use cached snapshots only')
+    parser.add_argument('--workers', type=int, default=N_WORKERS)
+    args = parser.parse_args()
+
+    stamps = snapshot_stamps(args.bgn_year, args.end_year, args.freq)
+    snapshots = extract_snapshots(stamps, args.offline, args.workers)
+    if args.freq == 'year':
+        for stamp, df in snapshots.items():
+            df.to_csv(f"sp500_ciks_{stamp[:4]}.csv", index=False)
+            print(f"Saved {len(df)} CIKs for {stamp[:4]}.")
+    elif snapshots:
+        # One file with a Date column; SP500_Membership.load_cik_snapshots reads it as dated snapshots
+        history = pd.concat([df.assign(Date=pd.Timestamp(stamp)) for stamp, df in snapshots.items()],
+                            ignore_index=True)
+        history[["Date", "Symbol", "CIK"]].to_csv(HISTORY_FILE, index=False)
+        print(f"Saved {len(snapshots)} snapshots ({len(history)} rows) to {HISTORY_FILE}.")
+
+
+if __name__ == '__main__':
+    main()
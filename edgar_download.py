@@ -27,10 +27,11 @@
    "outputs": [],
    "source": [
     "# Import packages\n",
-    "import edgar\n",
-    "import pandas as pd\n",
-    "import requests\n",
-    "import json"
+    "import EDGAR_Pac\n",
+    "import EDGAR_Tickers\n",
+    "import SP500_Membership\n",
+    "import build_sp500_files\n",
+    "import pandas as pd"
    ]
   },
   {
@@ -48,9 +49,9 @@
    "metadata": {},
    "outputs": [],
    "source": [
-    "# Download master indices from SEC\n",
-    "user_agent = \"DRod/1.0 (dr1902@nyu.edu; For educational purposes)\"\n",
-    "edgar.download_index('.', 2022, user_agent, skip_all_present_except_last=False)"
+    "# Download master indices from SEC into the local index cache\n",
+    "# Closed quarters are only fetched once; the current quarter is revalidated with a conditional GET\n",
+    "EDGAR_Pac.cache_masterindices(2022, pd.to_datetime('today').year)"
    ]
   },
   {
@@ -69,7 +70,8 @@
    "outputs": [],
    "source": [
     "# Load historical sp500 composition\n",
-    "sp500_com = pd.read_excel('sp500_composition.xlsx')"
+    "# Parsed once and cached as sp500_composition.npz; re-read only when the workbook changes\n",
+    "membership = SP500_Membership.load_composition('sp500_composition.xlsx')"
    ]
   },
   {
@@ -80,50 +82,7 @@
    "outputs": [],
    "source": [
     "# Present year\n",
-    "today = pd.to_datetime('today').year\n",
-    "\n",
-    "# Retrieve the sp500 composition from the previous quarter\n",
-    "def update_indices(year, quarter, form):\n",
-    "    # Assign timestamps for different quarters\n",
-    "    if quarter == 1:\n",
-    "        date = pd.Timestamp(year, 1, 1)\n",
-    "    elif quarter == 2:\n",
-    "        date = pd.Timestamp(year, 4, 1)\n",
-    "    elif quarter == 3:\n",
-    "        date = pd.Timestamp(year, 7, 1)\n",
-    "    else:\n",
-    "        date = pd.Timestamp(year, 10, 1)\n",
-    "\n",
-    "    # Find the closest date to the assigned dates to the quarters\n",
-    "    closest_date = find_close_date(date)\n",
-    "\n",
-    "    # Export company names of S&P500 based on the closest date\n",
-    "    if form == 'name':\n",
-    "        companies = sp500_com.loc[sp500_com.Date==closest_date, 'Company Name']\n",
-    "        lst = []\n",
-    "        for company in companies:\n",
-    "            lst.append(company.strip())\n",
-    "        return lst\n",
-    "    # Export tickers of S&P500 based on the closest date\n",
-    "    elif form == 'ticker':\n",
-    "        tickers = sp500_com.loc[sp500_com.Date==closest_date, 'Ticker']\n",
-    "        lst = []\n",
-    "        for ticker in tickers:\n",
-    "            lst.append(ticker.strip())\n",
-    "        return lst\n",
-    "\n",
-    "\n",
-    "# Find the closest date to the assigned dates to the quarters\n",
-    "def find_close_date(date):\n",
-    "    \n",
-    "    close_date = pd.Timestamp(2000, 1, 1)\n",
-    "    time_delta = date - close_date\n",
-    "    \n",
-    "    for row in sp500_com.iterrows():\n",
-    "        if row[1][0] <= date and date - row[1][0] < time_delta:\n",
-    "            close_date = row[1][0]\n",
-    "            time_delta = date - close_date\n",
-    "    return close_date"
+    "today = pd.to_datetime('today').year"
    ]
   },
   {
@@ -133,20 +92,9 @@
    "metadata": {},
    "outputs": [],
    "source": [
-    "# URL to the SEC's CIK-to-Ticker mapping file\n",
-    "url = \"https://www.sec.gov/files/company_tickers.json\"\n",
-    "headers = {'User-Agent':\"DRod/1.0 (dr1902@nyu.edu; For educational purposes)\"}\n",
-    "\n",
-    "# Download the file\n",
-    "response = requests.get(url, headers=headers)\n",
-    "data = response.json()\n",
-    "\n",
-    "# Function to get ticker from CIK\n",
-    "def get_ticker_from_cik(cik):\n",
-    "    for company in data.values():\n",
-    "        if company['cik_str'] == cik:\n",
-    "            return company['ticker']\n",
-    "    return None"
+    "# CIK <-> ticker mapping from the SEC's company_tickers.json\n",
+    "# Cached on disk and re-downloaded only when older than a week (see EDGAR_Tickers.py)\n",
+    "resolver = EDGAR_Tickers.TickerResolver()"
    ]
   },
   {
@@ -207,49 +155,10 @@
     }
    ],
    "source": [
-    "prefix = 'https://www.sec.gov/Archives/'\n",
-    "company_name = []\n",
-    "time = []\n",
-    "file = []\n",
-    "link = []\n",
-    "\n",
-    "for year in range(2022, today+1):\n",
-    "    \n",
-    "    # There's been only 3 quarters so far in 2024\n",
-    "    if year==today:\n",
-    "        quarters = 4\n",
-    "    else:\n",
-    "        quarters = 5\n",
-    "    \n",
-    "    for quarter in range(1, quarters):\n",
-    "        \n",
-    "        # Loading master index\n",
-    "        filename = str(year)+'-QTR'+str(quarter)+'.tsv'\n",
-    "        mas_ind = pd.read_csv(filename, sep='|', header=None)\n",
-    "        \n",
-    "        # Retrieving tickers using the updated(latest) sp500 composition\n",
-    "        sp_tlst = update_indices(year, quarter, 'ticker')\n",
-    "        \n",
-    "        # Checking every file entry\n",
-    "        for i in range(len(mas_ind.loc[:, 0])):\n",
-    "\n",
-    "            # Getting tickers using cik from master index\n",
-    "            cik = int(mas_ind.loc[i, 0])\n",
-    "            ticker = get_ticker_from_cik(cik)\n",
-    "\n",
-    "            # Checking if the ticker is in sp500\n",
-    "            if ticker in sp_tlst:\n",
-    "                # Checking if the file is 10K or 10Q\n",
-    "                if mas_ind.loc[i, 2] == '10-K' or mas_ind.loc[i, 2]=='10-K/A' or mas_ind.loc[i, 2]=='10-Q' or mas_ind.loc[i, 2]=='10-Q/A':\n",
-    "                    company_name.append(mas_ind.loc[i, 1])\n",
-    "                    time.append(str(year)+'Q'+str(quarter))\n",
-    "                    file.append(mas_ind.loc[i, 2])\n",
-    "                    url = prefix+mas_ind.loc[i, 5]\n",
-    "                    link.append(url)\n",
-    "                else:\n",
-    "                    continue\n",
-    "            else:\n",
-    "                continue"
+    "# 10K and 10Q filings of sp500 companies (composition in effect at the start of each quarter)\n",
+    "# Quarters are parsed and joined against the composition in parallel; see build_sp500_files.py,\n",
+    "#   which also runs from the command line:  python build_sp500_files.py --bgn-year 2022\n",
+    "df = build_sp500_files.build_sp500_files(2022, today, membership=membership, resolver=resolver)"
    ]
   },
   {
@@ -404,8 +313,6 @@
     }
    ],
    "source": [
-    "file_dict = {'company_name': company_name, 'published_time': time, 'type': file, 'link_url': link}\n",
-    "df = pd.DataFrame(file_dict)\n",
     "df"
    ]
   },
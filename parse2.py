@@ -1,47 +1,62 @@
 import os
 import re
-import glob
 import time
 import pandas as pd
 from tqdm import tqdm
 from collections import Counter
 from multiprocessing import Pool, cpu_count
+import Corpus_IO
+import Corpus_Pack
+import Load_MasterDictionary as LM
 
 # === CONFIGURATION ===
 LM_DICT_FILE = os.path.expanduser('~/Desktop/asg1/LoughranMcDonald_MasterDictionary_2024.csv')
 TARGET_FILES = os.path.expanduser('~/Desktop/asg1/data/**/*.txt')
+PACK_DIR = None  # Set to a Corpus_Pack directory to read packed shards instead of TARGET_FILES
+PACK_PATTERN = '**/*.txt'
+CHUNK_SIZE = Corpus_IO.CHUNK_SIZE  # Characters read at a time, bounding memory on huge filings (None = whole file)
 OUTPUT_FILE = os.path.expanduser('~/Desktop/asg1/results/parse_output2.csv')
 
 # === Load LM Words from Dictionary File ===
 def load_lm_words(path):
-    df = pd.read_csv(path)
-    df = df[df['Word'].notnull()]            # Remove NaNs
-    df['Word'] = df['Word'].str.upper()
-    return set(df['Word'])
+    # From the compiled dictionary artifact (Load_MasterDictionary); 'NA'/'NULL' are left out as
+    #   they were when this read the CSV with pandas
+    return LM.category_words(path, pandas_na=True)
 
 # === Tokenize and Filter Text ===
 def tokenize(text):
     return re.findall(r'\b[A-Z]{2,}\b', text.upper())
 
-# === Core Parsing Logic (Worker Function) ===
-def process_file(args):
-    filepath, lm_words = args
-    try:
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-            text = f.read()
+# === Score One Filing's Text (shared with pipeline.py) ===
+def score_text(text, filename, lm_words):
+    return score_chunks([text], filename, lm_words)
+
+def score_chunks(chunks, filename, lm_words):
+    # Same rows as score_text on the joined chunks (Corpus_IO.iter_chunks), one chunk's tokens at a time
+    tf_counts = Counter()
+    for chunk in chunks:
+        tf_counts.update(word for word in tokenize(chunk) if word in lm_words)
+    a_j = sum(tf_counts.values())
+    if a_j == 0:
+        print("a_j is 0, causing empty return")
+        return []
+
+    cik = filename.split('_')[0] if '_' in filename else 'unknown'
 
-        tokens = tokenize(text)
-        filtered = [word for word in tokens if word in lm_words]
-        a_j = len(filtered)
-        if a_j == 0:
-            print("a_j is 0, causing empty return")
-            return []
+    return [[filename, cik, word, tf_ij, a_j] for word, tf_ij in tf_counts.items()]
 
-        tf_counts = Counter(filtered)
-        filename = os.path.basename(filepath)
-        cik = filename.split('_')[0] if '_' in filename else 'unknown'
+# === Worker State (dictionary sent once per process, not with every file) ===
+_lm_words = None
 
-        return [[filename, cik, word, tf_ij, a_j] for word, tf_ij in tf_counts.items()]
+def init_worker(lm_words):
+    global _lm_words
+    _lm_words = lm_words
+
+# === Core Parsing Logic (Worker Function) ===
+def process_file(filepath):
+    try:
+        chunks = Corpus_IO.iter_chunks(filepath, CHUNK_SIZE)  # decompresses .gz/.zst in the worker
+        return score_chunks(chunks, Corpus_IO.filing_basename(filepath), _lm_words)
 
     except Exception as e:
         print(f"Error processing {filepath}: {e}")
@@ -50,18 +65,20 @@ def process_file(args):
 # === Main Function ===
 def main():
     print("Starting parse2.py...")
-    files = glob.glob(TARGET_FILES, recursive=True)
+    if PACK_DIR:
+        files = Corpus_Pack.list_filings(PACK_DIR, PACK_PATTERN)
+    else:
+        files = Corpus_IO.filing_glob(TARGET_FILES)
     print(f"Found {len(files)} .txt files to parse.")
 
     lm_words = load_lm_words(LM_DICT_FILE)
     print(f"Loaded {len(lm_words)} LM dictionary words.")
 
-    args_list = [(file, lm_words) for file in files]
     all_results = []
 
     start_time = time.time()
-    with Pool(processes=cpu_count()) as pool:
-        for result in tqdm(pool.imap_unordered(process_file, args_list), total=len(files), desc="Parsing"):
+    with Pool(processes=cpu_count(), initializer=init_worker, initargs=(lm_words,)) as pool:
+        for result in tqdm(pool.imap_unordered(process_file, files), total=len(files), desc="Parsing"):
             if result:
                 all_results.extend(result)
 
@@ -1,38 +1,45 @@
 import os
 import re
-import glob
 import time
 import pandas as pd
 from tqdm import tqdm
 from collections import Counter
 from multiprocessing import Pool, cpu_count
+import Corpus_IO
+import Corpus_Pack
 from load_harvard_negative import load_harvard_neg_words
 
 # === CONFIGURATION ===
 HARVARD_DICT_FILE = os.path.expanduser('~/Desktop/asg1/inquirerbasic.csv')
 YEAR = '2024'  # Change this for each year
 TARGET_FILES = os.path.expanduser(f'~/Desktop/asg1/data/{YEAR}/**/*.txt')
+PACK_DIR = None  # Set to a Corpus_Pack directory to read packed shards instead of TARGET_FILES
+PACK_PATTERN = f'{YEAR}/**/*.txt'
+CHUNK_SIZE = Corpus_IO.CHUNK_SIZE  # Characters read at a time, bounding memory on huge filings (None = whole file)
 OUTPUT_FILE = os.path.expanduser(f'~/Desktop/asg1/results/parse2_harvard_negative_{YEAR}.csv')
 
 # === Tokenize and Filter Text ===
 def tokenize(text):
     return re.findall(r'\b[A-Z]{2,}\b', text.upper())
 
+# === Worker State (word set sent once per process, not with every file) ===
+_neg_words = None
+
+def init_worker(neg_words):
+    global _neg_words
+    _neg_words = neg_words
+
 # === Core Parsing Logic (Worker Function) ===
-def process_file(args):
-    filepath, neg_words = args
+def process_file(filepath):
     try:
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-            text = f.read()
-
-        tokens = tokenize(text)
-        filtered = [word for word in tokens if word in neg_words]
-        a_j = len(filtered)
+        tf_counts = Counter()
+        for chunk in Corpus_IO.iter_chunks(filepath, CHUNK_SIZE):  # decompresses .gz/.zst in the worker
+            tf_counts.update(word for word in tokenize(chunk) if word in _neg_words)
+        a_j = sum(tf_counts.values())
         if a_j == 0:
             return []
 
-        tf_counts = Counter(filtered)
-        filename = os.path.basename(filepath)
+        filename = Corpus_IO.filing_basename(filepath)
         cik = filename.split('_')[0] if '_' in filename else 'unknown'
 
         return [[filename, cik, word, tf_ij, a_j] for word, tf_ij in tf_counts.items()]
@@ -44,18 +51,20 @@ def process_file(args):
 # === Main Function ===
 def main():
     print(f"\n Parsing Harvard negative words for year {YEAR}...")
-    files = glob.glob(TARGET_FILES, recursive=True)
+    if PACK_DIR:
+        files = Corpus_Pack.list_filings(PACK_DIR, PACK_PATTERN)
+    else:
+        files = Corpus_IO.filing_glob(TARGET_FILES)
     print(f"Found {len(files)} .txt files to parse.")
 
     neg_words = load_harvard_neg_words(HARVARD_DICT_FILE)
     print(f"Loaded {len(neg_words)} Harvard negative words.")
 
-    args_list = [(file, neg_words) for file in files]
     all_results = []
 
     start_time = time.time()
-    with Pool(processes=cpu_count()) as pool:
-        for result in tqdm(pool.imap_unordered(process_file, args_list), total=len(files), desc="Parsing"):
+    with Pool(processes=cpu_count(), initializer=init_worker, initargs=(neg_words,)) as pool:
+        for result in tqdm(pool.imap_unordered(process_file, files), total=len(files), desc="Parsing"):
             if result:
                 all_results.extend(result)
 
@@ -0,0 +1,87 @@
+import os
+import time
+import pandas as pd
+from tqdm import tqdm
+from multiprocessing import Pool, cpu_count
+import Corpus_IO
+import Corpus_Pack
+import Lexicon_Registry
+from load_harvard_negative import load_harvard_neg_words
+
+# One pass over the corpus scores every lexicon below (see Lexicon_Registry); each lexicon's
+#   rows go to its own CSV in the layout parse2.py / parse_by_h.py / parse_byYear.py write.
+#   Only YEAR is scanned, so the 'LM' rows go to parse_LM_<YEAR>.csv rather than parse2.py's
+#   all-years parse_output2.csv.
+
+# === CONFIGURATION ===
+LM_DICT_FILE = os.path.expanduser('~/Desktop/asg1/LoughranMcDonald_MasterDictionary_2024.csv')
+HARVARD_DICT_FILE = os.path.expanduser('~/Desktop/asg1/inquirerbasic.csv')
+CUSTOM_LISTS = {}  # name -> word list file (one word per line), e.g. {'esg': '~/Desktop/asg1/esg.txt'}
+YEAR = '2024'
+TARGET_FILES = os.path.expanduser(f'~/Desktop/asg1/data/{YEAR}/**/*.txt')
+PACK_DIR = None  # Set to a Corpus_Pack directory to read packed shards instead of TARGET_FILES
+PACK_PATTERN = f'{YEAR}/**/*.txt'
+CHUNK_SIZE = Corpus_IO.CHUNK_SIZE  # Characters read at a time, bounding memory on huge filings (None = whole file)
+OUTPUT_DIR = os.path.expanduser('~/Desktop/asg1/results/')
+OUTPUT_FILES = {  # lexicon -> output file; lexicons not listed are written to <OUTPUT_DIR>/parse_<name>_<YEAR>.csv
+    'LM_negative': f'parse2_negative_only_{YEAR}.csv',
+    'harvard_negative': f'parse2_harvard_negative_{YEAR}.csv',
+}
+COLUMNS = ['filename', 'CIK', 'word', 'tf_ij', 'a_j']
+
+# === Build the Registry ===
+def build_registry():
+    registry = Lexicon_Registry.LexiconRegistry()
+    registry.register_lm(LM_DICT_FILE, categories=(None, 'negative'))
+    if os.path.exists(HARVARD_DICT_FILE):
+        registry.register('harvard_negative', load_harvard_neg_words(HARVARD_DICT_FILE))
+    for name, path in CUSTOM_LISTS.items():
+        registry.register(name, Lexicon_Registry.load_word_list(os.path.expanduser(path)))
+    return registry
+
+# === Worker (registry sent once per process) ===
+_registry = None
+
+def init_worker(registry):
+    global _registry
+    _registry = registry
+
+def process_file(filepath):
+    try:
+        chunks = Corpus_IO.iter_chunks(filepath, CHUNK_SIZE)  # decompresses .gz/.zst in the worker
+        return _registry.score_chunks(chunks, Corpus_IO.filing_basename(filepath))
+    except Exception as e:
+        print(f"Error processing {filepath}: {e}")
+        return {}
+
+# === Main Function ===
+def main():
+    print(f"Scoring all lexicons for year: {YEAR}")
+    if PACK_DIR:
+        files = Corpus_Pack.list_filings(PACK_DIR, PACK_PATTERN)
+    else:
+        files = Corpus_IO.filing_glob(TARGET_FILES)
+    print(f"Found {len(files)} .txt files to parse.")
+
+    registry = build_registry()
+    print(f"Registered {len(registry.names)} lexicons ({', '.join(registry.names)}) over {len(registry.words)} words.")
+
+    all_results = {name: [] for name in registry.names}
+    start_time = time.time()
+    with Pool(processes=cpu_count(), initializer=init_worker, initargs=(registry,)) as pool:
+        for result in tqdm(pool.imap_unordered(process_file, files), total=len(files), desc="Parsing"):
+            for name, rows in result.items():
+                all_results[name].extend(rows)
+
+    for name, rows in all_results.items():
+        output_file = os.path.join(OUTPUT_DIR, OUTPUT_FILES.get(name, f'parse_{name}_{YEAR}.csv'))
+        if rows:
+            pd.DataFrame(rows, columns=COLUMNS).to_csv(output_file, index=False)
+            print(f"{name}: {len(rows)} word rows saved to {output_file}")
+        else:
+            print(f"{name}: no data extracted.")
+
+    print(f"Completed in {time.time() - start_time:.2f} seconds.")
+
+if __name__ == '__main__':
+    main()
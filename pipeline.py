@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+import pandas as pd
+from tqdm import tqdm
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool, cpu_count
+import Corpus_IO
+import EDGAR_Downloader
+import EDGAR_Pac
+import parse2
+import SP500_Membership
+
+# Streaming download -> score pipeline.
+#   Filings are fetched into memory by the rate-limited download engine and handed
+#   straight to a pool of scoring workers (same rows as parse2.py), so a quarter is
+#   scored as it is fetched, without writing the corpus and re-reading it.
+#   At most QUEUE_SIZE fetched filings wait for a scorer; downloaders block beyond that.
+
+# === CONFIGURATION ===
+LM_DICT_FILE = os.path.expanduser('~/Desktop/asg1/LoughranMcDonald_MasterDictionary_2024.csv')
+FORMS = ['10-K']
+BGN_YEAR, END_YEAR = 2024, 2024
+BGN_QTR, END_QTR = 1, 4
+SP500_SNAPSHOTS = SP500_Membership.PARM_CIK_SNAPSHOTS  # Point-in-time S&P 500 filter; None = every filer
+EDGAR_PREFIX = 'https://www.sec.gov/Archives/'
+N_DOWNLOADERS = 8
+MAX_RATE = 10                    # SEC allows at most 10 requests/second
+N_SCORERS = cpu_count()
+QUEUE_SIZE = 64                  # Fetched filings allowed to wait for a scorer
+EXHIBITS = None                  # None = full submission; tuple = primary document + these exhibit types
+PERSIST_ROOT = None              # Also keep the raw filings under <root>/<year>/QTR<n>/ (None = don't)
+PERSIST_COMPRESS = None          # None, 'gzip' or 'zstd' for persisted filings (see Corpus_IO)
+OUTPUT_FILE = os.path.expanduser('~/Desktop/asg1/results/parse_pipeline_output.csv')
+
+# === Build Jobs from the Master Indices ===
+def quarter_jobs(year, qtr, ciks=None):
+    # [(url, relative file name)] named exactly as download_forms names them
+    # main() has just cached/revalidated every quarter, so the cache is read as is
+    masterindex = EDGAR_Pac.load_masterindex(year, qtr, forms=FORMS, ciks=ciks, revalidate=False)
+    jobs = []
+    file_count = {}
+    for item in masterindex or []:
+        fid = str(item.cik) + str(item.filingdate) + item.form
+        file_count[fid] = file_count.get(fid, 0) + 1
+        fname = (str(item.filingdate) + '_' + item.form.replace('/', '-') + '_' + item.path.replace('/', '_'))
+        fname = fname.replace('.txt', '_' + str(file_count[fid]) + '.txt')
+        jobs.append((EDGAR_PREFIX + item.path, f"{year}/QTR{qtr}/{fname}"))
+    return jobs
+
+# === Optional Raw Persistence ===
+def persist(relname, data):
+    path = Corpus_IO.compressed_name(os.path.join(PERSIST_ROOT, relname), PERSIST_COMPRESS)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Written under a temporary name (keeping the compression suffix), then renamed into place
+    tmp_path = os.path.join(os.path.dirname(path), '.' + os.path.basename(relname) + '.part')
+    tmp_path = Corpus_IO.compressed_name(tmp_path, PERSIST_COMPRESS)
+    with Corpus_IO.open_binary(tmp_path, 'wb') as f_out:
+        f_out.write(data)
+    os.replace(tmp_path, path)
+
+# === Scoring Workers ===
+_lm_words = None
+
+def init_worker(lm_words):
+    # Dictionary is sent once per worker, not with every filing
+    global _lm_words
+    _lm_words = lm_words
+
+def score_filing(filename, data):
+    try:
+        text = data.decode('utf-8', errors='ignore')  # same decoding as Corpus_IO.read_filing
+        return parse2.score_text(text, filename, _lm_words)
+    except Exception as e:
+        print(f"Error processing {filename}: {e}")
+        return []
+
+# === Pipeline ===
+def run_pipeline(jobs, lm_words, engine=None):
+    # Returns (word rows, urls that failed to download)
+    engine = engine if engine else EDGAR_Downloader.DownloadEngine(n_workers=N_DOWNLOADERS, max_rate=MAX_RATE,
+                                                                     exhibits=EXHIBITS)
+    slots = threading.BoundedSemaphore(QUEUE_SIZE)
+    lock = threading.Lock()
+    all_results, failed = [], []
+
+    with Pool(processes=N_SCORERS, initializer=init_worker, initargs=(lm_words,)) as pool, \
+            tqdm(total=len(jobs), desc="Fetch+score") as bar:
+
+        def scored(rows):
+            with lock:
+                all_results.extend(rows)
+                bar.update()
+            slots.release()
+
+        def not_scored(e):
+            print(f"Error scoring: {e}")
+            scored([])
+
+        def fetch(job):
+            url, relname = job
+            data = engine.retrieve(url)
+            if data is None:
+                with lock:
+                    failed.append(url)
+                    bar.update()
+                return
+            if PERSIST_ROOT:
+                persist(relname, data)
+            slots.acquire()  # back-pressure: wait for a free slot in the scoring queue
+            pool.apply_async(score_filing, (os.path.basename(relname), data), callback=scored,
+                             error_callback=not_scored)
+
+        with ThreadPoolExecutor(max_workers=engine.n_workers) as executor:
+            for _ in executor.map(fetch, jobs):
+                pass
+        pool.close()
+        pool.join()
+
+    return all_results, failed
+
+# === Main Function ===
+def main():
+    print("Starting pipeline.py...")
+    membership = SP500_Membership.load_cik_snapshots(SP500_SNAPSHOTS) if SP500_SNAPSHOTS else None
+    EDGAR_Pac.cache_masterindices(BGN_YEAR, END_YEAR, BGN_QTR, END_QTR)
+    jobs = []
+    for year in range(BGN_YEAR, END_YEAR + 1):
+        for qtr in range(BGN_QTR, END_QTR + 1):
+            ciks = membership.members(*SP500_Membership.quarter_bounds(year, qtr)) if membership else None
+            jobs.extend(quarter_jobs(year, qtr, ciks))
+    print(f"Found {len(jobs)} filings to fetch and score.")
+
+    lm_words = parse2.load_lm_words(LM_DICT_FILE)
+    print(f"Loaded {len(lm_words)} LM dictionary words.")
+
+    start_time = time.time()
+    all_results, failed = run_pipeline(jobs, lm_words)
+    print(f"Parsed {len(all_results)} total word rows; {len(failed)} download(s) failed.")
+
+    if all_results:
+        df = pd.DataFrame(all_results, columns=['filename', 'CIK', 'word', 'tf_ij', 'a_j'])
+        df.to_csv(OUTPUT_FILE, index=False)
+        print(f"Output saved to: {OUTPUT_FILE}")
+    else:
+        print("No data was extracted. Check LM dictionary and downloads.")
+
+    print(f"Completed in {time.time() - start_time:.2f} seconds.")
+
+if __name__ == '__main__':
+    main()